@@ -1,7 +1,16 @@
 # analyze_ohlcv.py
 import os
 import json
-from openai import OpenAI
+
+_client = None
+
+def get_client():
+    # 常駐モードでは接続を使い回すため、クライアントは1度だけ生成する
+    global _client
+    if _client is None:
+        from openai import OpenAI  # 重いので呼び出し時にのみ import
+        _client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    return _client
 
 def analyze_ai_input(ai_input, symbol, asset_type, latest_price, model_name="gpt-4o-mini"):
     """
@@ -10,7 +19,7 @@ def analyze_ai_input(ai_input, symbol, asset_type, latest_price, model_name="gpt
     asset_type: "forex" or "crypto"
     latest_price: float, 最新価格
     """
-    client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+    client = get_client()
 
     # === データ抽出 ===
     recent_ohlc = {
@@ -32,6 +41,14 @@ def analyze_ai_input(ai_input, symbol, asset_type, latest_price, model_name="gpt
 
     timeframe_relationship = ai_input.get("timeframe_relationship")
 
+    # 銘柄間相関・通貨強弱（cross_asset.py で集計済みの場合のみ）
+    cross_asset = ai_input.get("cross_asset")
+    cross_asset_block = (
+        f"\n銘柄間相関・通貨強弱（直近{cross_asset.get('window_bars')}本の1時間足）:\n"
+        f"{json.dumps(cross_asset, ensure_ascii=False, indent=2)}\n"
+        if cross_asset else ""
+    )
+
     # === 最新レート ===
     bid = ai_input.get("latest_rate", {}).get("bid", latest_price)
     ask = ai_input.get("latest_rate", {}).get("ask", latest_price)
@@ -70,7 +87,7 @@ def analyze_ai_input(ai_input, symbol, asset_type, latest_price, model_name="gpt
 
 時間足の関係性:
 {json.dumps(timeframe_relationship, ensure_ascii=False, indent=2)}
-
+{cross_asset_block}
 最新レート:
 Bid={bid}, Ask={ask}
 
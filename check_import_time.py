@@ -0,0 +1,74 @@
+# check_import_time.py
+"""
+通知系エントリポイントの起動時 import の回帰チェック。
+python -X importtime で notify_discord_all / forex_news_notify を import し、
+重い依存（pandas / openai / feedparser / dateutil）が読み込まれていないこと、
+import 合計時間が予算内であることを確認する。違反があれば終了コード 1。
+"""
+import os
+import sys
+import subprocess
+import argparse
+
+ENTRY_MODULES = ["notify_discord_all", "forex_news_notify"]
+
+# スキップ経路では読み込まれてはいけないモジュール
+FORBIDDEN_MODULES = ["pandas", "openai", "feedparser", "dateutil"]
+
+# import 合計時間の予算（ミリ秒）。現状は requests がほぼ全て（約90ms）
+DEFAULT_BUDGET_MS = 250
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def measure_imports(modules=ENTRY_MODULES):
+    """
+    新しいインタプリタで modules を import し、(合計ミリ秒, 読み込まれた禁止モジュール, 重い順の依存内訳) を返す。
+    """
+    code = (
+        f"import sys\n"
+        f"import {', '.join(modules)}\n"
+        f"print(' '.join(m for m in {FORBIDDEN_MODULES!r} if m in sys.modules))\n"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_DIR, capture_output=True, text=True, check=True,
+    )
+    loaded = proc.stdout.split()
+
+    # "import time: self [us] | cumulative | imported package"
+    # 字下げの無い行がトップレベルの import。インタプリタ起動分（site 等）は除き、
+    # 対象モジュールの cumulative の和を合計時間とする
+    total_us = 0
+    rows = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if name.startswith("  "):
+            rows.append((int(cumulative), name.strip()))
+        elif name.strip() in modules:
+            total_us += int(cumulative)
+    rows.sort(reverse=True)
+    return total_us / 1000, loaded, rows
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="通知系エントリポイントの import 時間チェック")
+    parser.add_argument("--budget_ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--top", type=int, default=5, help="表示する重い import の件数")
+    args = parser.parse_args()
+
+    total_ms, loaded, rows = measure_imports()
+    print(f"import {', '.join(ENTRY_MODULES)}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    for cumulative, name in rows[:args.top]:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    failed = False
+    if loaded:
+        print(f"NG: heavy modules loaded at import: {', '.join(loaded)}")
+        failed = True
+    if total_ms > args.budget_ms:
+        print(f"NG: import time {total_ms:.1f} ms exceeds budget {args.budget_ms:.0f} ms")
+        failed = True
+    if not failed:
+        print("OK")
+    sys.exit(1 if failed else 0)
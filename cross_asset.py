@@ -0,0 +1,209 @@
+# cross_asset.py
+import os
+import json
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+CROSS_ASSET_STATE_FILE = "cross_asset_state.npz"
+CROSS_ASSET_SUMMARY_FILE = "cross_asset_summary.json"
+
+# 相関を取る足と窓（本数）
+CROSS_ASSET_INTERVAL = "1hour"
+CROSS_ASSET_WINDOW = 120
+
+# 丸め誤差の蓄積を避けるため、この本数ごとにバッファから和を取り直す
+RESYNC_EVERY = 1000
+
+# ==== ローリング相関（和・積和を差分更新） ====
+class RollingCrossAsset:
+    """
+    全銘柄の対数リターンを窓 window 本で保持し、
+    和 S と積和 P を1本ごとに差分更新して相関行列と通貨強弱を求める（1本あたり O(N^2)）。
+    """
+
+    def __init__(self, symbols, window=CROSS_ASSET_WINDOW, markets=None):
+        self.symbols = list(symbols)
+        self.window = window
+        # 通貨強弱は symbols.csv で type が forex の銘柄だけを通貨ペアとして扱う（BTC_JPY 等は除外）
+        markets = markets if markets is not None else [None] * len(self.symbols)
+        self.fx_symbols = {s for s, m in zip(self.symbols, markets) if str(m).lower() == "forex"}
+        n = len(self.symbols)
+        self.buffer = np.zeros((window, n))
+        self.pos = 0
+        self.count = 0
+        self.updates = 0
+        self.sums = np.zeros(n)
+        self.cross = np.zeros((n, n))
+        self.last_close = np.full(n, np.nan)
+        self.last_time = None
+
+    # ---- 永続化 ----
+    def save(self, path=CROSS_ASSET_STATE_FILE):
+        np.savez(
+            path,
+            symbols=np.array(self.symbols),
+            window=self.window,
+            buffer=self.buffer,
+            pos=self.pos,
+            count=self.count,
+            updates=self.updates,
+            sums=self.sums,
+            cross=self.cross,
+            last_close=self.last_close,
+            last_time=np.array("" if self.last_time is None else str(self.last_time)),
+        )
+
+    @classmethod
+    def load(cls, symbols, path=CROSS_ASSET_STATE_FILE, window=CROSS_ASSET_WINDOW, markets=None):
+        # 銘柄構成や窓が変わった場合は作り直す
+        if not os.path.exists(path):
+            return cls(symbols, window, markets)
+        with np.load(path) as st:
+            if list(st["symbols"]) != list(symbols) or int(st["window"]) != window:
+                return cls(symbols, window, markets)
+            obj = cls(symbols, window, markets)
+            obj.buffer = st["buffer"]
+            obj.pos = int(st["pos"])
+            obj.count = int(st["count"])
+            obj.updates = int(st["updates"])
+            obj.sums = st["sums"]
+            obj.cross = st["cross"]
+            obj.last_close = st["last_close"]
+            last_time = str(st["last_time"])
+            obj.last_time = pd.Timestamp(last_time) if last_time else None
+        return obj
+
+    # ---- 更新 ----
+    def push(self, ret: np.ndarray):
+        ret = np.nan_to_num(ret)  # 休場中の銘柄は変化なしとみなす
+        old = self.buffer[self.pos]
+        self.sums += ret - old
+        self.cross += np.outer(ret, ret) - np.outer(old, old)
+        self.buffer[self.pos] = ret
+        self.pos = (self.pos + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        self.updates += 1
+        if self.updates % RESYNC_EVERY == 0:
+            self.sums = self.buffer.sum(axis=0)
+            self.cross = self.buffer.T @ self.buffer
+
+    def update(self, closes: pd.DataFrame):
+        """
+        closes: index=OpenTime, columns=symbols の終値表。last_time より新しい足だけ取り込む。
+        """
+        closes = closes.reindex(columns=self.symbols).sort_index()
+        if self.last_time is not None:
+            closes = closes[closes.index > self.last_time]
+        if closes.empty:
+            return 0
+
+        values = closes.to_numpy(dtype="float64")
+        # 前回最後の終値を先頭に付けて、最初の新規足のリターンも求める
+        prev = np.vstack([self.last_close, values])
+        prev = pd.DataFrame(prev).ffill().to_numpy()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rets = np.diff(np.log(prev), axis=0)
+
+        for ret in rets:
+            self.push(ret)
+
+        last = pd.DataFrame(values).ffill().to_numpy()[-1]
+        self.last_close = np.where(np.isnan(last), self.last_close, last)
+        self.last_time = closes.index[-1]
+        return len(rets)
+
+    # ---- 集計 ----
+    def correlation(self) -> np.ndarray:
+        n = max(self.count, 1)
+        mean = self.sums / n
+        cov = self.cross / n - np.outer(mean, mean)
+        std = np.sqrt(np.clip(np.diag(cov), 0, None))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            corr = cov / np.outer(std, std)
+        return np.clip(np.nan_to_num(corr), -1.0, 1.0)
+
+    def currency_strength(self) -> dict:
+        """
+        FX ペア（fx_symbols の BASE_QUOTE）の窓内累積リターンから通貨ごとの強弱を求める。
+        base には +r、quote には -r を配分し、出現ペア数で平均する。
+        """
+        pairs = [(i, s.split("_")) for i, s in enumerate(self.symbols) if s in self.fx_symbols]
+        currencies = sorted({c for _, pair in pairs for c in pair})
+        if not currencies:
+            return {}
+        idx = {c: k for k, c in enumerate(currencies)}
+        weights = np.zeros((len(currencies), len(self.symbols)))
+        for i, (base, quote) in pairs:
+            weights[idx[base], i] += 1.0
+            weights[idx[quote], i] -= 1.0
+        counts = np.abs(weights).sum(axis=1)
+        strength = (weights @ self.sums) / np.maximum(counts, 1)
+        return {c: float(v) for c, v in zip(currencies, strength)}
+
+    def summaries(self, top_n=3) -> dict:
+        corr = self.correlation()
+        strength = self.currency_strength()
+        ranking = sorted(strength, key=strength.get, reverse=True)
+
+        out = {}
+        for i, symbol in enumerate(self.symbols):
+            others = [j for j in range(len(self.symbols)) if j != i]
+            top = sorted(others, key=lambda j: -abs(corr[i, j]))[:top_n]
+            summary = {
+                "window_bars": int(self.count),
+                "top_correlations": {self.symbols[j]: round(float(corr[i, j]), 2) for j in top},
+                "avg_abs_correlation": round(float(np.abs(corr[i, others]).mean()), 2) if others else 0.0,
+            }
+            if symbol in self.fx_symbols and strength:
+                base, quote = symbol.split("_")
+                summary["currency_strength"] = {
+                    c: {"score": round(strength[c] * 100, 3), "rank": ranking.index(c) + 1}
+                    for c in (base, quote)
+                }
+                summary["currency_count"] = len(ranking)
+            out[symbol] = summary
+        return out
+
+# ==== CSV から終値表を作る ====
+def load_closes(df_symbols: pd.DataFrame, interval: str = CROSS_ASSET_INTERVAL) -> pd.DataFrame:
+    series = {}
+    for symbol, market in zip(df_symbols["symbol"], df_symbols["type"]):
+        fname = f"{symbol}_{interval}_{market}.csv"
+        if not os.path.exists(fname):
+            continue
+        df = pd.read_csv(fname, usecols=["OpenTime", "Close"], parse_dates=["OpenTime"])
+        series[symbol] = df.drop_duplicates("OpenTime", keep="last").set_index("OpenTime")["Close"]
+    return pd.DataFrame(series)
+
+def update_cross_asset(df_symbols: pd.DataFrame, state_file=CROSS_ASSET_STATE_FILE,
+                       summary_file=CROSS_ASSET_SUMMARY_FILE):
+    rolling = RollingCrossAsset.load(
+        df_symbols["symbol"].tolist(), state_file, markets=df_symbols["type"].tolist()
+    )
+    added = rolling.update(load_closes(df_symbols))
+    rolling.save(state_file)
+
+    with open(summary_file, "w", encoding="utf-8") as f:
+        json.dump(rolling.summaries(), f, ensure_ascii=False, indent=2)
+    load_summary.cache_clear()
+    print(f"Cross-asset: +{added} bars, saved {summary_file}")
+    return rolling
+
+@lru_cache(maxsize=None)
+def load_summary(path=CROSS_ASSET_SUMMARY_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("symbols_csv", type=str, help="銘柄リストCSV (例: symbols.csv)")
+    args = parser.parse_args()
+
+    update_cross_asset(pd.read_csv(args.symbols_csv))
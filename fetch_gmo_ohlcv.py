@@ -1,64 +1,34 @@
 import sys
-import requests
 import pandas as pd
-from datetime import datetime, timedelta, date
-import time
+from datetime import datetime
 
-CRYPTO_KLINES_URL = "https://api.coin.z.com/public/v1/klines"
-FOREX_KLINES_URL = "https://forex-api.coin.z.com/public/v1/klines"
-CRYPTO_TICKER_URL = "https://api.coin.z.com/public/v1/ticker"
-FOREX_TICKER_URL = "https://forex-api.coin.z.com/public/v1/ticker"
+from gmo_client import OHLCV_COLUMNS, fetch_klines, fetch_ticker
+from ohlcv_quality import repair_ohlcv
+from instruments import quantize_ohlcv
+from market_calendar import recent_pages
 
 # === OHLCV取得関数（従来通り） ===
-def fetch_ohlcv(symbol: str, interval: str, market: str, price_type: str = "BID", days: int = 30):
+def fetch_ohlcv(symbol: str, interval: str, market: str, price_type: str = "BID", days: int = 30, pages=None):
+    """
+    pages（klines の date パラメータ）を指定しなければ、JST の現在から days ページ分を取得する。
+    リクエスト間隔は gmo_client のレート制限に任せる。
+    """
+    if pages is None:
+        pages = recent_pages(interval, days)
+
     dfs = []
-    if interval in ["4hour", "8hour", "12hour", "1day", "1week", "1month"]:
-        for yr in [date.today().year - 1, date.today().year]:
-            params = {"symbol": symbol, "interval": interval, "date": str(yr)}
-            url = FOREX_KLINES_URL if market == "forex" else CRYPTO_KLINES_URL
-            if market == "forex":
-                params["priceType"] = price_type
-            try:
-                resp = requests.get(url, params=params)
-                jd = resp.json()
-                if jd.get("status") != 0 or "data" not in jd or not jd["data"]:
-                    continue
-                df = pd.DataFrame(jd["data"])
-                df["OpenTime"] = pd.to_datetime(df["openTime"].astype(int), unit="ms", utc=True)\
-                                  .dt.tz_convert("Asia/Tokyo").dt.tz_localize(None)
-                df["Volume"] = df.get("volume", 0) if market == "forex" else df["volume"]
-                df = df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close"})
-                dfs.append(df[["OpenTime", "Open", "High", "Low", "Close", "Volume"]])
-            except Exception as e:
-                print(f"{market} {symbol} fetch error ({yr}): {e}")
-            time.sleep(1)
-    else:
-        today = datetime.now().date()
-        for i in range(days):
-            date_iter = today - timedelta(days=i)
-            date_str = date_iter.strftime("%Y%m%d")
-            params = {"symbol": symbol, "interval": interval, "date": date_str}
-            url = FOREX_KLINES_URL if market == "forex" else CRYPTO_KLINES_URL
-            if market == "forex":
-                params["priceType"] = price_type
-            try:
-                resp = requests.get(url, params=params)
-                jd = resp.json()
-                if jd.get("status") != 0 or "data" not in jd or not jd["data"]:
-                    continue
-                df = pd.DataFrame(jd["data"])
-                df["OpenTime"] = pd.to_datetime(df["openTime"].astype(int), unit="ms", utc=True)\
-                                  .dt.tz_convert("Asia/Tokyo").dt.tz_localize(None)
-                df["Volume"] = df.get("volume", 0) if market == "forex" else df["volume"]
-                df = df.rename(columns={"open": "Open", "high": "High", "low": "Low", "close": "Close"})
-                dfs.append(df[["OpenTime", "Open", "High", "Low", "Close", "Volume"]])
-            except Exception as e:
-                print(f"{market} {symbol} fetch error on {date_str}: {e}")
-            time.sleep(1)
+    for date_str in pages:
+        try:
+            df = fetch_klines(symbol, interval, market, date_str, price_type=price_type)
+            if not df.empty:
+                dfs.append(df)
+        except Exception as e:
+            print(f"{market} {symbol} fetch error on {date_str}: {e}")
     if dfs:
-        return pd.concat(dfs).sort_values("OpenTime").reset_index(drop=True)
+        df = pd.concat(dfs).sort_values("OpenTime").reset_index(drop=True)
+        return quantize_ohlcv(df, symbol)
     else:
-        return pd.DataFrame(columns=["OpenTime", "Open", "High", "Low", "Close", "Volume"])
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
 
 # === 最新レート取得（ForexとCrypto共通化） ===
 def fetch_all_latest_prices():
@@ -67,31 +37,14 @@ def fetch_all_latest_prices():
     """
     all_data = {}
 
-    # Forex
-    try:
-        resp = requests.get(FOREX_TICKER_URL)
-        jd = resp.json()
-        if jd.get("status") == 0 and "data" in jd:
-            for d in jd["data"]:
-                all_data[d["symbol"]] = {"symbol": d["symbol"], "type": "forex",
-                                         "bid": float(d["bid"]), "ask": float(d["ask"]),
-                                         "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-    except Exception as e:
-        print(f"Error fetching Forex latest prices: {e}")
-    time.sleep(1)
-
-    # Crypto
-    try:
-        resp = requests.get(CRYPTO_TICKER_URL)
-        jd = resp.json()
-        if jd.get("status") == 0 and "data" in jd:
-            for d in jd["data"]:
-                all_data[d["symbol"]] = {"symbol": d["symbol"], "type": "crypto",
+    for market, label in [("forex", "Forex"), ("crypto", "Crypto")]:
+        try:
+            for d in fetch_ticker(market):
+                all_data[d["symbol"]] = {"symbol": d["symbol"], "type": market,
                                          "bid": float(d["bid"]), "ask": float(d["ask"]),
                                          "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")}
-    except Exception as e:
-        print(f"Error fetching Crypto latest prices: {e}")
-    time.sleep(1)
+        except Exception as e:
+            print(f"Error fetching {label} latest prices: {e}")
 
     return all_data
 
@@ -107,7 +60,7 @@ if __name__ == "__main__":
     df_symbols = pd.read_csv(csv_file)
     symbols_list = df_symbols["symbol"].tolist()
 
-    # === OHLCV取得（直列、1秒間隔） ===
+    # === OHLCV取得（直列、間隔は gmo_client のレート制限） ===
     for _, row in df_symbols.iterrows():
         symbol = row["symbol"]
         market = row["type"]
@@ -118,6 +71,9 @@ if __name__ == "__main__":
             if df.empty:
                 print(f"No data for {symbol} {interval}")
                 continue
+            # 欠損・重複・異常値のあるページだけ再取得（再取得分も呼値単位に丸める）
+            df, _ = repair_ohlcv(df, symbol, interval, market)
+            df = quantize_ohlcv(df, symbol)
             out_name = f"{symbol}_{interval}_{market}.csv"
             df.to_csv(out_name, index=False)
             print(f"Saved {out_name}")
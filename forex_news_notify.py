@@ -1,11 +1,13 @@
 import os
-import feedparser
-from openai import OpenAI
+import csv
+import json
+import re
+import calendar
 import datetime
 import requests
 import argparse
-import pandas as pd
-from dateutil import parser as date_parser
+
+# feedparser / dateutil / openai は使う関数内で遅延 import する
 
 # ====== 設定 ======
 NEWS_FEEDS = [
@@ -14,11 +16,167 @@ NEWS_FEEDS = [
     "https://feeds.bbci.co.uk/news/business/rss.xml",
 ]
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 DISCORD_WEBHOOK = os.getenv("DISCORD_FOREX_MAIN")
 
-# ====== ニュース取得 ======
-def fetch_news():
+# ETag / Last-Modified と取得済みエントリを保持する永続キャッシュ
+NEWS_CACHE_FILE = os.getenv("NEWS_CACHE_FILE", "news_feed_cache.json")
+# フィード1件あたりの (connect, read) タイムアウト秒
+FEED_TIMEOUT = (5, 15)
+# 見出しごとの関連通貨判定と、対象期間ごとの分析結果を保持するキャッシュ
+NEWS_SUMMARY_CACHE_FILE = os.getenv("NEWS_SUMMARY_CACHE_FILE", "news_summary_cache.json")
+# キーワード表を変えたら上げる（キャッシュ済みの分類結果を破棄する）
+CLASSIFIER_VERSION = 2
+
+# 通貨ごとの関連キーワード（小文字・単語境界で照合）
+CURRENCY_KEYWORDS = {
+    "USD": ["dollar", "greenback", "fed", "federal reserve", "fomc", "powell", "u.s.", "treasury",
+            "treasuries", "wall street", "nonfarm", "payrolls", "jobs", "jobless", "white house",
+            "trump", "bessent", "america", "american"],
+    "JPY": ["yen", "japan", "japanese", "boj", "bank of japan", "ueda", "nikkei", "tokyo", "jgb"],
+    "EUR": ["euro", "eurozone", "euro zone", "ecb", "european central bank", "lagarde", "germany",
+            "german", "france", "french", "italy", "bund"],
+    "GBP": ["pound", "sterling", "boe", "bank of england", "bailey", "britain", "british", "uk",
+            "u.k.", "gilt", "gilts"],
+    "AUD": ["aussie", "australia", "australian", "rba", "reserve bank of australia", "bullock"],
+    "NZD": ["kiwi", "new zealand", "rbnz"],
+    "CAD": ["loonie", "canada", "canadian", "bank of canada", "boc"],
+    "CHF": ["franc", "swiss", "switzerland", "snb"],
+    "ZAR": ["rand", "south africa", "south african", "sarb"],
+    "MXN": ["peso", "mexico", "mexican", "banxico"],
+    "TRY": ["lira", "turkey", "turkish", "turkiye"],
+    "CNH": ["yuan", "renminbi", "china", "chinese", "pboc", "beijing"],
+}
+# 大文字小文字を区別して照合するキーワード（小文字の "us" は代名詞と衝突するため）
+CASE_SENSITIVE_KEYWORDS = {
+    "USD": ["US", "USA"],
+}
+# 通貨を問わず為替全体に効くマクロキーワード
+MACRO_KEYWORDS = ["inflation", "cpi", "interest rate", "rate cut", "rate hike", "central bank",
+                  "gdp", "recession", "tariff", "tariffs", "bond yields", "forex", "currency",
+                  "currencies", "oil prices"]
+
+def _keyword_pattern(words):
+    return re.compile("|".join(rf"(?<![a-z]){re.escape(w)}(?![a-z])" for w in words))
+
+CURRENCY_PATTERNS = {ccy: _keyword_pattern(words) for ccy, words in CURRENCY_KEYWORDS.items()}
+CASE_SENSITIVE_PATTERNS = {
+    ccy: re.compile("|".join(rf"\b{re.escape(w)}\b" for w in words))
+    for ccy, words in CASE_SENSITIVE_KEYWORDS.items()
+}
+MACRO_PATTERN = _keyword_pattern(MACRO_KEYWORDS)
+
+_client = None
+
+def get_client():
+    # OpenAI クライアントは初回利用時に生成
+    global _client
+    if _client is None:
+        from openai import OpenAI
+        _client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    return _client
+
+# ====== フィードキャッシュ ======
+def load_feed_cache(path=NEWS_CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    cache.setdefault("feeds", {})
+    cache.setdefault("entries", {})
+    return cache
+
+def save_feed_cache(cache, path=NEWS_CACHE_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def _entry_guid(e):
+    return getattr(e, "id", "") or getattr(e, "link", "") or getattr(e, "title", "")
+
+def _entry_timestamp(e, date_parser):
+    # feedparser が解釈済みの struct_time (UTC) を優先し、無ければ dateutil で解析
+    parsed = getattr(e, "published_parsed", None) or getattr(e, "updated_parsed", None)
+    if parsed:
+        return calendar.timegm(parsed)
+    published_raw = getattr(e, "published", "") or getattr(e, "updated", "")
+    published_dt = date_parser.parse(published_raw)
+    if published_dt.tzinfo is None:
+        published_dt = published_dt.replace(tzinfo=datetime.timezone.utc)
+    return published_dt.timestamp()
+
+def _fetch_feed(session, url, feed_state):
+    """
+    条件付きGETでフィードを取得する。
+    戻り値: (status, 応答ヘッダ, feedparserの解析結果 or None)。304 と取得失敗時は解析結果 None。
+    """
+    import feedparser
+
+    headers = {}
+    if feed_state.get("etag"):
+        headers["If-None-Match"] = feed_state["etag"]
+    if feed_state.get("modified"):
+        headers["If-Modified-Since"] = feed_state["modified"]
+    try:
+        resp = session.get(url, headers=headers, timeout=FEED_TIMEOUT)
+    except requests.RequestException as e:
+        print(f"Feed fetch error: {url} ({e})")
+        return None, {}, None
+    if resp.status_code != 200:
+        if resp.status_code != 304:
+            print(f"Feed fetch error: {url} (HTTP {resp.status_code})")
+        return resp.status_code, resp.headers, None
+    return resp.status_code, resp.headers, feedparser.parse(resp.content)
+
+def update_feed_cache(cache, feeds=NEWS_FEEDS, max_workers=8):
+    from concurrent.futures import ThreadPoolExecutor
+    from dateutil import parser as date_parser
+
+    states = [cache["feeds"].setdefault(url, {}) for url in feeds]
+    with requests.Session() as session, \
+            ThreadPoolExecutor(max_workers=min(max_workers, len(feeds)) or 1) as ex:
+        results = list(ex.map(lambda u, st: _fetch_feed(session, u, st), feeds, states))
+
+    entries = cache["entries"]
+    for url, state, (_, headers, feed) in zip(feeds, states, results):
+        # 304（変更なし）や取得失敗はキャッシュ済みエントリをそのまま使う
+        if feed is None:
+            continue
+        if getattr(feed, "bozo", False) and not feed.entries:
+            print(f"Feed parse error: {url}")
+            continue
+
+        guids = []
+        for e in feed.entries:
+            guid = _entry_guid(e)
+            if not guid:
+                continue
+            # 既知のGUIDは再解析しない（フィード間・実行間で重複排除）
+            if guid not in entries:
+                try:
+                    ts = _entry_timestamp(e, date_parser)
+                except Exception:
+                    continue
+                entries[guid] = {"title": e.title, "published": ts}
+            guids.append(guid)
+
+        state["entries"] = guids
+        if headers.get("ETag"):
+            state["etag"] = headers["ETag"]
+        if headers.get("Last-Modified"):
+            state["modified"] = headers["Last-Modified"]
+
+    return cache
+
+def prune_feed_cache(cache, oldest_ts):
+    entries = cache["entries"]
+    for guid in [g for g, v in entries.items() if v["published"] < oldest_ts]:
+        del entries[guid]
+    for state in cache["feeds"].values():
+        state["entries"] = [g for g in state.get("entries", []) if g in entries]
+    return cache
+
+# ====== 対象期間 ======
+def news_window():
     # JST現在時刻
     now_jst = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=9)))
     today_7am = now_jst.replace(hour=7, minute=0, second=0, microsecond=0)
@@ -30,40 +188,116 @@ def fetch_news():
         # 朝7時以降に実行された場合 → 今日7:00～明日7:00まで
         start_jst = today_7am
         end_jst = today_7am + datetime.timedelta(days=1)
+    return start_jst, end_jst
 
+# ====== ニュース取得 ======
+def fetch_news(start_jst, end_jst, cache_file=NEWS_CACHE_FILE):
     print(f"📅 対象期間: {start_jst.strftime('%Y-%m-%d %H:%M')} ～ {end_jst.strftime('%Y-%m-%d %H:%M')} JST")
 
+    cache = update_feed_cache(load_feed_cache(cache_file))
+    start_ts, end_ts = start_jst.timestamp(), end_jst.timestamp()
+    # 1日分の余裕を残して古いエントリを削除
+    prune_feed_cache(cache, start_ts - 86400)
+    save_feed_cache(cache, cache_file)
+
     news_items = []
+    seen = set()
+    entries = cache["entries"]
     for url in NEWS_FEEDS:
-        feed = feedparser.parse(url)
-        for e in feed.entries:
-            published_raw = getattr(e, "published", "") or getattr(e, "updated", "")
-            try:
-                published_dt = date_parser.parse(published_raw)
-                if published_dt.tzinfo is None:
-                    published_dt = published_dt.replace(tzinfo=datetime.timezone.utc)
-                published_jst = published_dt.astimezone(datetime.timezone(datetime.timedelta(hours=9)))
-            except Exception:
+        for guid in cache["feeds"].get(url, {}).get("entries", []):
+            if guid in seen:
                 continue
+            seen.add(guid)
+            entry = entries[guid]
 
             # 対象期間に含まれるニュースのみ抽出
-            if not (start_jst <= published_jst < end_jst):
+            if not (start_ts <= entry["published"] < end_ts):
                 continue
 
-            title = e.title
-            news_items.append(f"・{title}（{published_jst.strftime('%Y-%m-%d %H:%M')} JST）")
+            news_items.append({"guid": guid, "title": entry["title"], "published": entry["published"]})
 
+    return news_items
+
+def format_news(news_items):
     if not news_items:
         return "該当する期間内のニュースはありません。"
 
-    return "\n".join(news_items[:30])  # 多すぎる場合は上限30件
+    jst = datetime.timezone(datetime.timedelta(hours=9))
+    lines = [
+        f"・{item['title']}（{datetime.datetime.fromtimestamp(item['published'], jst).strftime('%Y-%m-%d %H:%M')} JST）"
+        for item in news_items[:30]  # 多すぎる場合は上限30件
+    ]
+    return "\n".join(lines)
+
+
+# ====== 関連度フィルタ ======
+def symbol_currencies(symbols: list[str]) -> set[str]:
+    # "USD_JPY" → {"USD", "JPY"}
+    return {ccy for symbol in symbols for ccy in symbol.split("_")}
+
+def classify_headline(title: str) -> list[str]:
+    text = title.lower()
+    matched = [
+        ccy for ccy, pattern in CURRENCY_PATTERNS.items()
+        if pattern.search(text) or (ccy in CASE_SENSITIVE_PATTERNS and CASE_SENSITIVE_PATTERNS[ccy].search(title))
+    ]
+    if MACRO_PATTERN.search(text):
+        matched.append("MACRO")
+    return matched
+
+def load_summary_cache(path=NEWS_SUMMARY_CACHE_FILE):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            cache = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        cache = {}
+    if cache.get("classifier_version") != CLASSIFIER_VERSION:
+        cache["classified"] = {}
+        cache["classifier_version"] = CLASSIFIER_VERSION
+    return cache
+
+def save_summary_cache(cache, path=NEWS_SUMMARY_CACHE_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(cache, f, ensure_ascii=False)
+
+def filter_relevant_news(news_items, currencies, cache):
+    """
+    見出しを通貨キーワードで分類し、対象通貨（またはマクロ全般）に関係するものだけ返す。
+    分類結果は GUID 単位で cache["classified"] に保存し、次回以降は再計算しない。
+    """
+    classified = cache["classified"]
+    relevant = []
+    for item in news_items:
+        tags = classified.get(item["guid"])
+        if tags is None:
+            tags = classified[item["guid"]] = classify_headline(item["title"])
+        if "MACRO" in tags or currencies.intersection(tags):
+            relevant.append(item)
+
+    # 対象期間外になった見出しの分類結果は捨てる
+    current = {item["guid"] for item in news_items}
+    cache["classified"] = {g: t for g, t in classified.items() if g in current}
+    return relevant
 
 
 # ====== GPTによる分析 ======
-def analyze_news(news_text: str, symbols: list[str], model: str) -> str:
+def analyze_news(news_text: str, symbols: list[str], model: str, previous_analysis: str = None) -> str:
     today = datetime.datetime.now(datetime.timezone(datetime.timedelta(hours=9))).strftime("%Y-%m-%d（%a）")
     symbol_list = ", ".join(symbols)
 
+    if previous_analysis:
+        # 同じ対象期間で既に分析済みの場合は、新着ニュースだけを渡して更新させる
+        news_block = f"""前回の分析結果：
+{previous_analysis}
+
+前回以降の新着ニュース：
+{news_text}
+
+前回の分析結果を新着ニュースで更新し、改めて上位3つを挙げてください。"""
+    else:
+        news_block = f"""ニュース一覧：
+{news_text}"""
+
     prompt = f"""
 あなたは熟練した外国為替アナリストです。
 以下の最新ニュースから、本日（{today} 7:00 JST〜翌日7:00 JST）の為替相場に影響しそうな
@@ -75,11 +309,10 @@ def analyze_news(news_text: str, symbols: list[str], model: str) -> str:
 2. 内容の要約（1行）
 3. 想定される影響（例：円高方向、ドル安方向、ユーロ買いなど）
 
-ニュース一覧：
-{news_text}
+{news_block}
 """
 
-    response = client.chat.completions.create(
+    response = get_client().chat.completions.create(
         model=model,
         messages=[{"role": "user", "content": prompt}],
     )
@@ -102,11 +335,41 @@ def main():
     parser.add_argument("--model", default="gpt-5-mini")
     args = parser.parse_args()
 
-    df = pd.read_csv(args.symbols_file)
-    forex_symbols = df[df["type"] == "forex"]["symbol"].tolist()
+    with open(args.symbols_file, "r", encoding="utf-8", newline="") as f:
+        forex_symbols = [r["symbol"] for r in csv.DictReader(f) if r["type"] == "forex"]
+
+    start_jst, end_jst = news_window()
+    news_items = fetch_news(start_jst, end_jst)
+
+    summary_cache = load_summary_cache()
+    relevant = filter_relevant_news(news_items, symbol_currencies(forex_symbols), summary_cache)
+    print(f"関連ニュース: {len(relevant)}/{len(news_items)} 件")
+
+    # 同じ対象期間・同じ銘柄構成の分析結果があれば差分だけをLLMに渡す
+    window_key = start_jst.isoformat()
+    previous = summary_cache.get("summary")
+    if not previous or previous.get("window") != window_key or previous.get("symbols") != forex_symbols:
+        previous = None
+
+    sent = set(previous["guids"]) if previous else set()
+    new_items = [item for item in relevant if item["guid"] not in sent][:30]
+
+    if previous is None:
+        analysis = analyze_news(format_news(new_items), forex_symbols, args.model)
+    elif new_items:
+        analysis = analyze_news(format_news(new_items), forex_symbols, args.model,
+                                previous_analysis=previous["analysis"])
+    else:
+        print("新着の関連ニュースなし。前回の分析結果を再利用します。")
+        analysis = previous["analysis"]
 
-    news_text = fetch_news()
-    analysis = analyze_news(news_text, forex_symbols, args.model)
+    summary_cache["summary"] = {
+        "window": window_key,
+        "symbols": forex_symbols,
+        "guids": sorted(sent | {item["guid"] for item in new_items}),
+        "analysis": analysis,
+    }
+    save_summary_cache(summary_cache)
 
     header = "🌅 **本日の為替注目ニュース (7:00 JST〜翌7:00 JST)**\n"
     send_discord(header + analysis)
@@ -0,0 +1,192 @@
+# gmo_client.py
+import time
+import threading
+
+import numpy as np
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+
+CRYPTO_BASE_URL = "https://api.coin.z.com/public"
+FOREX_BASE_URL = "https://forex-api.coin.z.com/public"
+
+OHLCV_COLUMNS = ["OpenTime", "Open", "High", "Low", "Close", "Volume"]
+
+# (connect, read) タイムアウト秒
+DEFAULT_TIMEOUT = (5, 15)
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 1.0
+
+# 再試行で回復しうる応答（status=5 はメンテナンス中）
+TRANSIENT_STATUSES = {5}
+TRANSIENT_MESSAGE_CODES = {
+    "ERR-5003",  # API呼び出し上限超過
+    "ERR-5201",  # 定期メンテナンス
+    "ERR-5202",  # 緊急メンテナンス
+}
+
+# 呼び出し上限（ERR-5003）に掛からないよう、プロセス全体でリクエストの間隔をこれ以上空ける（秒）
+MIN_REQUEST_INTERVAL = 0.2
+
+class GMOAPIError(Exception):
+    pass
+
+def _is_transient(jd: dict) -> bool:
+    if jd.get("status") in TRANSIENT_STATUSES:
+        return True
+    codes = {m.get("message_code") for m in jd.get("messages") or [] if isinstance(m, dict)}
+    return bool(codes & TRANSIENT_MESSAGE_CODES)
+
+# ==== セッション（スレッドごとに1つ、接続はプールして使い回す） ====
+_local = threading.local()
+
+def get_session() -> requests.Session:
+    session = getattr(_local, "session", None)
+    if session is None:
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        _local.session = session
+    return session
+
+# ==== レート制限（前回のリクエストから MIN_REQUEST_INTERVAL 未満のときだけ待つ） ====
+_rate_lock = threading.Lock()
+_last_request = 0.0
+
+def _throttle():
+    global _last_request
+    with _rate_lock:
+        wait = _last_request + MIN_REQUEST_INTERVAL - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        _last_request = time.monotonic()
+
+def base_url(market: str) -> str:
+    return FOREX_BASE_URL if market == "forex" else CRYPTO_BASE_URL
+
+# ==== 共通GET（タイムアウト・リトライ・応答検証） ====
+def get_json(url: str, params: dict = None, timeout=DEFAULT_TIMEOUT,
+             retries: int = MAX_RETRIES, backoff: float = BACKOFF_SECONDS) -> dict:
+    """
+    GMO公開APIを叩き、status == 0 の応答JSONを返す。
+    接続エラー・5xx・429・メンテナンス／呼び出し上限は指数バックオフで再試行し、
+    パラメータ不正などの恒久的なエラーは即座に GMOAPIError を送出する。
+    """
+    last_error = None
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        _throttle()
+        try:
+            resp = get_session().get(url, params=params, timeout=timeout)
+        except requests.RequestException as e:
+            last_error = e
+            continue
+
+        if resp.status_code >= 500 or resp.status_code == 429:
+            last_error = GMOAPIError(f"HTTP {resp.status_code}")
+            continue
+        if resp.status_code != 200:
+            # その他の 4xx はリトライしても結果が変わらない
+            raise GMOAPIError(f"HTTP {resp.status_code}: {resp.text[:200]}")
+
+        try:
+            jd = resp.json()
+        except ValueError as e:
+            last_error = GMOAPIError(f"invalid JSON: {e}")
+            continue
+
+        if jd.get("status") != 0:
+            error = GMOAPIError(f"status={jd.get('status')} messages={jd.get('messages')}")
+            if not _is_transient(jd):
+                raise error
+            last_error = error
+            continue
+        return jd
+
+    raise GMOAPIError(f"{url} {params}: {last_error}")
+
+# ==== kline デコード ====
+def decode_klines(data: list, market: str) -> pd.DataFrame:
+    """
+    klines の data（値は文字列）を OHLCV DataFrame に変換する。
+    列ごとに numpy でまとめて数値化し、行ごとの DataFrame 構築を避ける。
+    """
+    if not data:
+        return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    open_ms = np.fromiter((int(d["openTime"]) for d in data), dtype="int64", count=len(data))
+    # JSTのnaive datetimeに揃える（UTC+9、夏時間なし）
+    open_time = (open_ms + 9 * 3600 * 1000).astype("datetime64[ms]").astype("datetime64[ns]")
+
+    def column(key):
+        return np.array([d[key] for d in data], dtype="float64")
+
+    if market == "forex" and "volume" not in data[0]:
+        volume = np.zeros(len(data))
+    else:
+        volume = column("volume")
+
+    return pd.DataFrame({
+        "OpenTime": open_time,
+        "Open": column("open"),
+        "High": column("high"),
+        "Low": column("low"),
+        "Close": column("close"),
+        "Volume": volume,
+    })
+
+# ==== エンドポイント ====
+def fetch_klines(symbol: str, interval: str, market: str, date_str: str, price_type: str = "BID",
+                 **kwargs) -> pd.DataFrame:
+    params = {"symbol": symbol, "interval": interval, "date": date_str}
+    if market == "forex":
+        params["priceType"] = price_type
+    jd = get_json(f"{base_url(market)}/v1/klines", params, **kwargs)
+    return decode_klines(jd.get("data") or [], market)
+
+def fetch_ticker(market: str, **kwargs) -> list:
+    jd = get_json(f"{base_url(market)}/v1/ticker", **kwargs)
+    return jd.get("data") or []
+
+# ==== ローカルスタブサーバでの計測 ====
+if __name__ == "__main__":
+    import argparse
+    import json
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    parser = argparse.ArgumentParser(description="ローカルスタブサーバに対して kline 取得を計測")
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--requests", type=int, default=50)
+    args = parser.parse_args()
+
+    start_ms = 1_700_000_000_000
+    payload = json.dumps({"status": 0, "data": [
+        {"openTime": str(start_ms + i * 900_000), "open": "150.100", "high": "150.200",
+         "low": "150.000", "close": "150.150", "volume": "0"}
+        for i in range(args.bars)
+    ]}).encode()
+
+    class StubHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, *a):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    FOREX_BASE_URL = f"http://127.0.0.1:{server.server_port}"
+    MIN_REQUEST_INTERVAL = 0.0  # スタブ相手なので待たない
+
+    t0 = time.perf_counter()
+    for _ in range(args.requests):
+        df = fetch_klines("USD_JPY", "15min", "forex", "20240101")
+    elapsed = time.perf_counter() - t0
+    print(f"{args.requests} requests x {len(df)} bars: {elapsed:.3f}s ({elapsed / args.requests * 1000:.1f} ms/req)")
+    server.shutdown()
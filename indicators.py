@@ -0,0 +1,264 @@
+# indicators.py
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+except ImportError:  # numba が無ければ pandas の ewm（C実装）でベクトル化して計算
+    njit = None
+
+# ==== インジケータ設定（キーを消せば計算・出力されない） ====
+DEFAULT_INDICATORS = {
+    "sma": {"windows": [20, 50]},
+    "rsi": {"period": 14},
+    "macd": {"short": 12, "long": 26, "signal": 9},
+    "atr": {"period": 14},
+    "bollinger": {"window": 20, "k": 2.0},
+    "adx": {"period": 14},
+    "vwap": {"window": 20},
+}
+
+# ==== ローリング計算（累積和の差分で O(n)） ====
+def _rolling_sum(x, window):
+    out = np.full(len(x), np.nan)
+    if len(x) < window:
+        return out
+    # NaN を含む窓だけ NaN にする（NaN を0として累積し、窓内の NaN 数を別に数える）
+    nan = np.isnan(x)
+    csum = np.concatenate([[0.0], np.cumsum(np.where(nan, 0.0, x))])
+    cnan = np.concatenate([[0], np.cumsum(nan)])
+    sums = csum[window:] - csum[:-window]
+    sums[cnan[window:] - cnan[:-window] > 0] = np.nan
+    out[window - 1:] = sums
+    return out
+
+def _rolling_mean(x, window):
+    return _rolling_sum(x, window) / window
+
+def _rolling_std(x, window):
+    # 母標準偏差（ddof=0）。二乗和の桁落ちを抑えるため先頭の値を引いてから計算する
+    valid = x[~np.isnan(x)]
+    d = x - (valid[0] if len(valid) else 0.0)
+    mean = _rolling_mean(d, window)
+    return np.sqrt(np.clip(_rolling_mean(d * d, window) - mean * mean, 0, None))
+
+# ==== 再帰系（EMA / Wilder平滑）を1ループでまとめて計算 ====
+def _recursive_pass(high, low, close, short, long, signal, atr_n, adx_n):
+    """
+    MACD・ATR・ADX/DMI の漸化式を1回の走査で計算する。
+    EMA は pandas の ewm(adjust=False) と同じ初期化、ATR/ADX は Wilder の平滑化（SMAで初期化）。
+    """
+    n = len(close)
+    nan = np.nan
+    macd = np.full(n, nan)
+    macd_signal = np.full(n, nan)
+    atr = np.full(n, nan)
+    plus_di = np.full(n, nan)
+    minus_di = np.full(n, nan)
+    adx = np.full(n, nan)
+    if n == 0:
+        return macd, macd_signal, atr, plus_di, minus_di, adx
+
+    a_short = 2.0 / (short + 1)
+    a_long = 2.0 / (long + 1)
+    a_signal = 2.0 / (signal + 1)
+
+    ema_s = close[0]
+    ema_l = close[0]
+    sig = 0.0
+    tr_sum = 0.0
+    atr_v = 0.0
+    s_tr = 0.0
+    s_pdm = 0.0
+    s_mdm = 0.0
+    dx_sum = 0.0
+    adx_v = 0.0
+
+    for i in range(n):
+        c = close[i]
+        h = high[i]
+        lo = low[i]
+
+        # --- MACD ---
+        if i > 0:
+            ema_s += a_short * (c - ema_s)
+            ema_l += a_long * (c - ema_l)
+        m = ema_s - ema_l
+        sig = m if i == 0 else sig + a_signal * (m - sig)
+        macd[i] = m
+        macd_signal[i] = sig
+
+        # --- True Range ---
+        if i == 0:
+            tr = h - lo
+        else:
+            pc = close[i - 1]
+            tr = max(h - lo, abs(h - pc), abs(lo - pc))
+
+        # --- ATR ---
+        if i < atr_n:
+            tr_sum += tr
+            if i == atr_n - 1:
+                atr_v = tr_sum / atr_n
+                atr[i] = atr_v
+        else:
+            atr_v += (tr - atr_v) / atr_n
+            atr[i] = atr_v
+
+        # --- DMI / ADX ---
+        if i == 0:
+            continue
+        up = h - high[i - 1]
+        down = low[i - 1] - lo
+        pdm = up if (up > down and up > 0) else 0.0
+        mdm = down if (down > up and down > 0) else 0.0
+
+        if i <= adx_n:
+            s_tr += tr
+            s_pdm += pdm
+            s_mdm += mdm
+            if i < adx_n:
+                continue
+        else:
+            s_tr += tr - s_tr / adx_n
+            s_pdm += pdm - s_pdm / adx_n
+            s_mdm += mdm - s_mdm / adx_n
+
+        pdi = 100.0 * s_pdm / s_tr if s_tr > 0 else 0.0
+        mdi = 100.0 * s_mdm / s_tr if s_tr > 0 else 0.0
+        plus_di[i] = pdi
+        minus_di[i] = mdi
+        dx = 100.0 * abs(pdi - mdi) / (pdi + mdi) if (pdi + mdi) > 0 else 0.0
+
+        k = i - adx_n  # DX が出始めてからの本数
+        if k < adx_n:
+            dx_sum += dx
+            if k == adx_n - 1:
+                adx_v = dx_sum / adx_n
+                adx[i] = adx_v
+        else:
+            adx_v += (dx - adx_v) / adx_n
+            adx[i] = adx_v
+
+    return macd, macd_signal, atr, plus_di, minus_di, adx
+
+# ==== 再帰系のベクトル版（numba が無い場合） ====
+def _ema(x, alpha):
+    # ewm(adjust=False)：先頭の非NaN値を初期値として y += alpha * (x - y)
+    return pd.Series(x).ewm(alpha=alpha, adjust=False).mean().to_numpy()
+
+def _wilder(x, n, seed):
+    """
+    x[seed - n + 1 : seed + 1] の平均を初期値として seed 番目から Wilder 平滑（alpha = 1/n）。
+    seed より前は NaN。
+    """
+    out = np.full(len(x), np.nan)
+    if seed >= len(x):
+        return out
+    y = x[seed:].copy()
+    y[0] = x[seed - n + 1:seed + 1].mean()
+    out[seed:] = _ema(y, 1.0 / n)
+    return out
+
+def _recursive_vectorized(high, low, close, short, long, signal, atr_n, adx_n):
+    """
+    _recursive_pass と同じ値を、Python の行ループなしで計算する。
+    DMI の Wilder 累積和 (s += x - s/n) は n で割ると alpha = 1/n の EMA になり、比では n が消える。
+    """
+    n = len(close)
+    macd = _ema(close, 2.0 / (short + 1)) - _ema(close, 2.0 / (long + 1))
+    macd_signal = _ema(macd, 2.0 / (signal + 1))
+
+    prev_close = np.concatenate([close[:1], close[:-1]])
+    tr = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+    tr[:1] = high[:1] - low[:1]
+    atr = _wilder(tr, atr_n, atr_n - 1)
+
+    up = np.diff(high, prepend=np.nan)
+    down = -np.diff(low, prepend=np.nan)
+    pdm = np.where((up > down) & (up > 0), up, 0.0)
+    mdm = np.where((down > up) & (down > 0), down, 0.0)
+    s_tr = _wilder(tr, adx_n, adx_n)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        plus_di = np.where(s_tr > 0, 100.0 * _wilder(pdm, adx_n, adx_n) / s_tr, 0.0)
+        minus_di = np.where(s_tr > 0, 100.0 * _wilder(mdm, adx_n, adx_n) / s_tr, 0.0)
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum > 0, 100.0 * np.abs(plus_di - minus_di) / di_sum, 0.0)
+    plus_di[:min(adx_n, n)] = np.nan
+    minus_di[:min(adx_n, n)] = np.nan
+    adx = _wilder(dx, adx_n, 2 * adx_n - 1)
+
+    return macd, macd_signal, atr, plus_di, minus_di, adx
+
+if njit is not None:
+    _recursive_kernel = njit(cache=True)(_recursive_pass)
+else:
+    _recursive_kernel = _recursive_vectorized
+
+# ==== まとめて計算 ====
+def compute_indicators(high, low, close, volume, config=None) -> dict:
+    """
+    OHLCV の numpy 配列から、config で有効なインジケータをまとめて計算する。
+    戻り値: {列名: np.ndarray}
+    """
+    config = DEFAULT_INDICATORS if config is None else config
+    high = np.asarray(high, dtype="float64")
+    low = np.asarray(low, dtype="float64")
+    close = np.asarray(close, dtype="float64")
+    volume = np.asarray(volume, dtype="float64")
+    # High/Low の欠損は ATR・ADX の漸化式を以降ずっと NaN にするので、その足の終値で埋める
+    high = np.where(np.isnan(high), close, high)
+    low = np.where(np.isnan(low), close, low)
+    out = {}
+
+    for w in config.get("sma", {}).get("windows", []):
+        out[f"SMA_{w}"] = _rolling_mean(close, w)
+
+    if "rsi" in config:
+        p = config["rsi"]["period"]
+        # 先頭の差分は0（空配列でもそのまま空を返す）
+        delta = np.diff(close, prepend=close[:1])
+        avg_gain = _rolling_mean(np.clip(delta, 0, None), p)
+        avg_loss = _rolling_mean(np.clip(-delta, 0, None), p)
+        avg_gain[:p] = np.nan
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"RSI_{p}"] = 100 - 100 / (1 + avg_gain / avg_loss)
+
+    macd_cfg = config.get("macd", DEFAULT_INDICATORS["macd"])
+    atr_n = config.get("atr", DEFAULT_INDICATORS["atr"])["period"]
+    adx_n = config.get("adx", DEFAULT_INDICATORS["adx"])["period"]
+    if any(k in config for k in ("macd", "atr", "adx")):
+        macd, macd_signal, atr, plus_di, minus_di, adx = _recursive_kernel(
+            high, low, close, macd_cfg["short"], macd_cfg["long"], macd_cfg["signal"], atr_n, adx_n
+        )
+        if "macd" in config:
+            out["MACD"] = macd
+            out["MACD_signal"] = macd_signal
+        if "atr" in config:
+            out[f"ATR_{atr_n}"] = atr
+        if "adx" in config:
+            out[f"ADX_{adx_n}"] = adx
+            out[f"PLUS_DI_{adx_n}"] = plus_di
+            out[f"MINUS_DI_{adx_n}"] = minus_di
+
+    if "bollinger" in config:
+        w = config["bollinger"]["window"]
+        k = config["bollinger"]["k"]
+        mid = out.get(f"SMA_{w}")
+        if mid is None:
+            mid = _rolling_mean(close, w)
+        std = _rolling_std(close, w)
+        out["BB_upper"] = mid + k * std
+        out["BB_lower"] = mid - k * std
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out["BB_width"] = (out["BB_upper"] - out["BB_lower"]) / mid
+
+    if "vwap" in config:
+        # FX は出来高が無い（0）ので NaN になる
+        w = config["vwap"]["window"]
+        typical = (high + low + close) / 3
+        vol_sum = _rolling_sum(volume, w)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"VWAP_{w}"] = np.where(vol_sum > 0, _rolling_sum(typical * volume, w) / vol_sum, np.nan)
+
+    return out
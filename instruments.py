@@ -0,0 +1,66 @@
+# instruments.py
+import os
+import csv
+import math
+from functools import lru_cache
+
+INSTRUMENTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "instruments.csv")
+
+# ==== 銘柄メタデータ（呼値・桁数・数量ルール） ====
+@lru_cache(maxsize=None)
+def load_instruments(path: str = INSTRUMENTS_FILE) -> dict:
+    instruments = {}
+    try:
+        with open(path, "r", encoding="utf-8", newline="") as f:
+            for r in csv.DictReader(f):
+                instruments[r["symbol"]] = {
+                    "symbol": r["symbol"],
+                    "type": r["type"],
+                    "tick_size": float(r["tick_size"]),
+                    "price_decimals": int(r["price_decimals"]),
+                    "min_order_size": float(r["min_order_size"]),
+                    "size_step": float(r["size_step"]),
+                }
+    except FileNotFoundError:
+        print(f"Instrument table not found: {path}")
+    return instruments
+
+def get_instrument(symbol: str) -> dict:
+    inst = load_instruments().get(symbol)
+    if inst is not None:
+        return inst
+    # 未登録銘柄：クロス円は小数3桁、それ以外は5桁とみなす
+    decimals = 3 if symbol.endswith("_JPY") else 5
+    return {
+        "symbol": symbol,
+        "type": None,
+        "tick_size": 10 ** -decimals,
+        "price_decimals": decimals,
+        "min_order_size": 1.0,
+        "size_step": 1.0,
+    }
+
+def price_decimals(symbol: str) -> int:
+    return get_instrument(symbol)["price_decimals"]
+
+# ==== 価格の量子化・整形 ====
+def quantize_price(price: float, symbol: str) -> float:
+    # 欠損（NaN）はそのまま返す
+    if math.isnan(price):
+        return price
+    inst = get_instrument(symbol)
+    return round(round(price / inst["tick_size"]) * inst["tick_size"], inst["price_decimals"])
+
+def format_price(price: float, symbol: str) -> str:
+    return f"{quantize_price(price, symbol):.{price_decimals(symbol)}f}"
+
+def quantize_ohlcv(df, symbol: str, columns=("Open", "High", "Low", "Close")):
+    """
+    DataFrame の価格列を呼値単位に丸める（列単位のベクトル演算）。
+    """
+    inst = get_instrument(symbol)
+    tick = inst["tick_size"]
+    for col in columns:
+        if col in df:
+            df[col] = ((df[col].astype("float64") / tick).round() * tick).round(inst["price_decimals"])
+    return df
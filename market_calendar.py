@@ -0,0 +1,90 @@
+# market_calendar.py
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+JST = ZoneInfo("Asia/Tokyo")
+
+# 足の長さ（秒）
+INTERVAL_SECONDS = {
+    "15min": 15 * 60,
+    "1hour": 60 * 60,
+    "4hour": 4 * 60 * 60,
+}
+
+# 足の区切りは JST の0:00起点（4時間足なら 0/4/8/... 時）。
+# 保存済みの足から位相が分かる場合は bar_offset() で上書きする
+DEFAULT_BAR_OFFSET = timedelta(0)
+
+# GMO の日付ページは JST 6:00 始まり（6:00〜翌6:00 が1ページ）
+PAGE_OFFSET = timedelta(hours=6)
+
+# 年単位でページングされる足（それ以外は日付ページ）
+YEARLY_INTERVALS = ["4hour", "8hour", "12hour", "1day", "1week", "1month"]
+
+# FX のクローズ：土曜6:00 JST 〜 月曜7:00 JST
+# （冬時間は土曜7:00まで取引があるが、6:00以降は「無くても欠損扱いしない」側に倒す）
+FX_CLOSE = (5, 6 * 60)   # (weekday, 分)
+FX_OPEN = (0, 7 * 60)
+
+# ==== 足の位相 ====
+def bar_offset(open_times, interval: str) -> timedelta:
+    """
+    保存済み OpenTime（JST naive）から、JST 0:00 に対する足の位相を求める（最頻値）。
+    足が無ければ DEFAULT_BAR_OFFSET。
+    """
+    times = pd.DatetimeIndex(pd.to_datetime(pd.Series(open_times))).dropna()
+    if times.empty:
+        return DEFAULT_BAR_OFFSET
+    step = INTERVAL_SECONDS[interval]
+    seconds = (times - times.normalize()).total_seconds().astype("int64") % step
+    return timedelta(seconds=int(pd.Series(seconds).mode().iloc[0]))
+
+def closed_intervals(bar_close_jst: datetime, offsets: dict = None) -> list[str]:
+    """
+    JST の壁時計で、この時刻に確定する足の種類を返す。
+    """
+    offsets = offsets or {}
+    since_midnight = (
+        bar_close_jst - bar_close_jst.replace(hour=0, minute=0, second=0, microsecond=0)
+    ).total_seconds()
+    return [
+        iv for iv, sec in INTERVAL_SECONDS.items()
+        if (since_midnight - offsets.get(iv, DEFAULT_BAR_OFFSET).total_seconds()) % sec == 0
+    ]
+
+# ==== APIページ ====
+def page_of(open_time_jst: datetime, interval: str) -> str:
+    # その足を含む klines の date パラメータ
+    if interval in YEARLY_INTERVALS:
+        return str(open_time_jst.year)
+    return (open_time_jst - PAGE_OFFSET).strftime("%Y%m%d")
+
+def recent_pages(interval: str, days: int, now_jst: datetime = None) -> list[str]:
+    """
+    現在（JST）から遡って days ページ分の date パラメータ（新しい順）。年ページは前年と今年。
+    ホストのタイムゾーンには依存しない。
+    """
+    now_jst = datetime.now(JST) if now_jst is None else now_jst
+    if interval in YEARLY_INTERVALS:
+        return [str(now_jst.year - 1), str(now_jst.year)]
+    today = (now_jst - PAGE_OFFSET).date()
+    return [(today - timedelta(days=i)).strftime("%Y%m%d") for i in range(days)]
+
+def closed_bar_page(bar_close_jst: datetime, interval: str) -> str:
+    # bar_close_jst に確定した足を含むページ
+    return page_of(bar_close_jst - timedelta(seconds=INTERVAL_SECONDS[interval]), interval)
+
+# ==== FX の取引時間 ====
+def _week_minutes(weekday, minutes):
+    return weekday * 24 * 60 + minutes
+
+def is_fx_closed(ts_jst: datetime) -> bool:
+    m = _week_minutes(ts_jst.weekday(), ts_jst.hour * 60 + ts_jst.minute)
+    return m >= _week_minutes(*FX_CLOSE) or m < _week_minutes(*FX_OPEN)
+
+def fx_closed_mask(times: pd.DatetimeIndex):
+    # is_fx_closed のベクトル版（JST naive の DatetimeIndex）
+    m = times.dayofweek * 24 * 60 + times.hour * 60 + times.minute
+    return (m >= _week_minutes(*FX_CLOSE)) | (m < _week_minutes(*FX_OPEN))
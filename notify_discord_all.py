@@ -1,14 +1,15 @@
 # notify_discord_all.py
 import os
+import csv
 import json
-import pandas as pd
 from datetime import datetime
 from zoneinfo import ZoneInfo
 import requests
 import argparse
 
-from analyze_ohlcv import analyze_ai_input as analyze_ai
+# analyze_ohlcv (openai) は Stage2 でのみ遅延 import する
 from analyze_technical import analyze_ai_input as analyze_tech
+from instruments import format_price
 
 DISCORD_WEBHOOKS = {
     "forex": {
@@ -21,10 +22,13 @@ DISCORD_WEBHOOKS = {
     }
 }
 
+# 常駐モードで接続を使い回すためのセッション
+_session = requests.Session()
+
 def send_discord(embed, webhook_url):
     if not webhook_url:
         return
-    requests.post(webhook_url, json={"embeds": [embed]})
+    _session.post(webhook_url, json={"embeds": [embed]})
 
 def create_embed(symbol, ai_result, tech_result, latest_price):
     up = round(ai_result["up_probability"] * 100)
@@ -51,9 +55,9 @@ def create_embed(symbol, ai_result, tech_result, latest_price):
         fields.append({
             "name": f"IFD-OCO ({oco['risk']})",
             "value": (
-                f"Entry:{oco['entry']:.5f}\n"
-                f"TP:{oco['take_profit']:.5f}\n"
-                f"SL:{oco['stop_loss']:.5f}"
+                f"Entry:{format_price(oco['entry'], symbol)}\n"
+                f"TP:{format_price(oco['take_profit'], symbol)}\n"
+                f"SL:{format_price(oco['stop_loss'], symbol)}"
             ),
             "inline": True
         })
@@ -82,62 +86,43 @@ def create_skip_embed(symbol, reasons):
         }
     }
 
-def main():
-    parser = argparse.ArgumentParser()
-    parser.add_argument("--ai_input_file", required=True)
-    parser.add_argument("--latest_rates_file", required=True)
-    parser.add_argument("--symbol", required=True)
-    parser.add_argument("--asset_type", required=True)
-    parser.add_argument("--model", default="gpt-5-mini")
-    args = parser.parse_args()
-
-    other_webhook = DISCORD_WEBHOOKS[args.asset_type]["other"]
-    main_webhook = DISCORD_WEBHOOKS[args.asset_type]["main"]
-
-    # ===== 入力ロード =====
-    with open(args.ai_input_file, "r", encoding="utf-8") as f:
-        ai_input = json.load(f)
-
-    latest_df = pd.read_csv(args.latest_rates_file)
-    row = latest_df[latest_df["symbol"] == args.symbol]
-    if row.empty:
-        embed = create_skip_embed(args.symbol, ["最新レート取得失敗"])
-        send_discord(embed, other_webhook)
-        return
-
-    latest_price = (row.iloc[0]["bid"] + row.iloc[0]["ask"]) / 2
+def notify_symbol(ai_input, symbol, asset_type, latest_price, model_name="gpt-5-mini"):
+    other_webhook = DISCORD_WEBHOOKS[asset_type]["other"]
+    main_webhook = DISCORD_WEBHOOKS[asset_type]["main"]
 
     # ===== Stage1 =====
-    tech_pre = analyze_tech(ai_input, args.symbol, args.asset_type, latest_price)
+    tech_pre = analyze_tech(ai_input, symbol, asset_type, latest_price)
 
     if not tech_pre["llm_call_allowed"]:
-        embed = create_skip_embed(args.symbol, tech_pre.get("stage1_reasons", []))
+        embed = create_skip_embed(symbol, tech_pre.get("stage1_reasons", []))
         send_discord(embed, other_webhook)
         return
 
     # ===== Stage2 =====
+    from analyze_ohlcv import analyze_ai_input as analyze_ai
+
     ai_result = analyze_ai(
         ai_input,
-        args.symbol,
-        args.asset_type,
+        symbol,
+        asset_type,
         latest_price,
-        model_name=args.model
+        model_name=model_name
     )
 
     if not ai_result:
-        embed = create_skip_embed(args.symbol, ["AI分析結果が取得できませんでした"])
+        embed = create_skip_embed(symbol, ["AI分析結果が取得できませんでした"])
         send_discord(embed, other_webhook)
         return
 
     tech_post = analyze_tech(
         ai_input,
-        args.symbol,
-        args.asset_type,
+        symbol,
+        asset_type,
         latest_price,
         ai_result
     )
 
-    embed = create_embed(args.symbol, ai_result, tech_post, latest_price)
+    embed = create_embed(symbol, ai_result, tech_post, latest_price)
 
     # ===== 履歴通知 =====
     send_discord(embed, other_webhook)
@@ -150,5 +135,32 @@ def main():
     if prob >= 0.65:
         send_discord(embed, main_webhook)
 
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--ai_input_file", required=True)
+    parser.add_argument("--latest_rates_file", required=True)
+    parser.add_argument("--symbol", required=True)
+    parser.add_argument("--asset_type", required=True)
+    parser.add_argument("--model", default="gpt-5-mini")
+    args = parser.parse_args()
+
+    other_webhook = DISCORD_WEBHOOKS[args.asset_type]["other"]
+
+    # ===== 入力ロード =====
+    with open(args.ai_input_file, "r", encoding="utf-8") as f:
+        ai_input = json.load(f)
+
+    # 1行だけのCSVなので pandas は使わず csv で読む（起動高速化）
+    with open(args.latest_rates_file, "r", encoding="utf-8", newline="") as f:
+        row = next((r for r in csv.DictReader(f) if r["symbol"] == args.symbol), None)
+    if row is None:
+        embed = create_skip_embed(args.symbol, ["最新レート取得失敗"])
+        send_discord(embed, other_webhook)
+        return
+
+    latest_price = (float(row["bid"]) + float(row["ask"])) / 2
+
+    notify_symbol(ai_input, args.symbol, args.asset_type, latest_price, model_name=args.model)
+
 if __name__ == "__main__":
     main()
@@ -1,28 +1,21 @@
 import pandas as pd
 
-# ==== 特長量の計算 ====
-def add_features(df: pd.DataFrame):
-    df["SMA_20"] = df["Close"].rolling(window=20).mean()
-    df["SMA_50"] = df["Close"].rolling(window=50).mean()
-    df["RSI_14"] = compute_rsi(df["Close"], 14)
-    df["MACD"], df["MACD_signal"] = compute_macd(df["Close"])
-    return df
-
-def compute_rsi(series, period=14):
-    delta = series.diff()
-    gain = delta.clip(lower=0)
-    loss = -delta.clip(upper=0)
-    avg_gain = gain.rolling(window=period).mean()
-    avg_loss = loss.rolling(window=period).mean()
-    rs = avg_gain / avg_loss
-    return 100 - (100 / (1 + rs))
+from indicators import compute_indicators
+from parallel import map_tasks
 
-def compute_macd(series, short=12, long=26, signal=9):
-    ema_short = series.ewm(span=short, adjust=False).mean()
-    ema_long = series.ewm(span=long, adjust=False).mean()
-    macd = ema_short - ema_long
-    signal_line = macd.ewm(span=signal, adjust=False).mean()
-    return macd, signal_line
+# ==== 特長量の計算 ====
+def add_features(df: pd.DataFrame, config=None):
+    # 全インジケータを numpy 配列上で一括計算（config は indicators.DEFAULT_INDICATORS 形式）
+    cols = compute_indicators(
+        df["High"].to_numpy(dtype="float64"),
+        df["Low"].to_numpy(dtype="float64"),
+        df["Close"].to_numpy(dtype="float64"),
+        df["Volume"].to_numpy(dtype="float64"),
+        config,
+    )
+    # 列を1つずつ追加すると DataFrame の再構築が列数分走るので、まとめて連結する
+    features = pd.DataFrame(cols, index=df.index)
+    return pd.concat([df.drop(columns=features.columns, errors="ignore"), features], axis=1)
 
 # ==== CSVから特徴量計算 ====
 def process_csv(file_path: str):
@@ -45,16 +38,22 @@ def process_csv(file_path: str):
     print(f"Saved {out_name}")
     return df
 
+# ==== 並列実行用タスク ====
+def _process_task(file_path: str):
+    # DataFrame をプロセス間で返すとpickleコストが大きいので行数だけ返す
+    df = process_csv(file_path)
+    return None if df is None else len(df)
+
 # ==== メイン処理（symbols.csv 一括処理）====
-def main(symbols_csv: str):
+def main(symbols_csv: str, workers: int = 1):
     intervals = ["15min", "1hour", "4hour"]
 
     # symbols.csv は 1列目: symbol, 2列目: type (crypto/forex)
     df_symbols = pd.read_csv(symbols_csv)
 
-    for _, row in df_symbols.iterrows():
-        symbol = row["symbol"]
-        market = row["type"].lower()  # crypto or forex
+    # (symbol, interval) ごとに独立したタスクとして列挙
+    tasks = []
+    for symbol, market in zip(df_symbols["symbol"], df_symbols["type"].str.lower()):
         print(f"\n=== Processing {symbol} ({market}) ===")
 
         for interval in intervals:
@@ -62,14 +61,20 @@ def main(symbols_csv: str):
                 file_name = f"{symbol}_{interval}_forex.csv"
             else:
                 file_name = f"{symbol}_{interval}_crypto.csv"
+            tasks.append(file_name)
 
-            process_csv(file_name)
+    # 各ワーカーはCSVパスだけ受け取り自前で読み込む（配列のpickle転送なし）
+    # 結果は投入順に返るので出力順は直列実行と同じ
+    if workers > 1:
+        print(f"Processing {len(tasks)} files with {workers} workers")
+    return map_tasks(_process_task, tasks, workers)
 
 if __name__ == "__main__":
     import argparse
 
     parser = argparse.ArgumentParser()
     parser.add_argument("symbols_csv", type=str, help="銘柄リストCSV (例: symbols.csv)")
+    parser.add_argument("--workers", type=int, default=1, help="並列プロセス数 (1 = 直列)")
     args = parser.parse_args()
 
-    main(args.symbols_csv)
+    main(args.symbols_csv, workers=args.workers)
@@ -0,0 +1,174 @@
+# ohlcv_quality.py
+import json
+
+import numpy as np
+import pandas as pd
+
+from gmo_client import fetch_klines
+from market_calendar import PAGE_OFFSET, YEARLY_INTERVALS, fx_closed_mask
+
+INTERVAL_FREQ = {
+    "15min": "15min",
+    "1hour": "1h",
+    "4hour": "4h",
+}
+
+# 外れ値判定：対数リターンのロバストzスコア閾値
+OUTLIER_Z = 12.0
+
+# 再取得しても解消しなかった足（祝日休場・メンテナンス等）の記録。
+# 実行ごとに作業ディレクトリが消える環境（GitHub Actions）では実行間で引き継ぐこと（api_check.yml の cache 参照）
+KNOWN_ISSUES_FILE = "ohlcv_known_issues.json"
+
+# 再取得の対象になる問題
+REFETCH_ISSUES = ["gap", "outlier"]
+
+# ==== 期待される足グリッド ====
+def expected_grid(start, end, interval: str, market: str) -> pd.DatetimeIndex:
+    grid = pd.date_range(start, end, freq=INTERVAL_FREQ[interval])
+    if market != "forex":
+        return grid
+
+    # FXのクローズ時間帯は market_calendar の定義に従う（pipeline_daemon と共通）
+    return grid[~fx_closed_mask(grid)]
+
+# ==== 品質インデックス ====
+def build_quality_index(df: pd.DataFrame, interval: str, market: str, known=None) -> pd.DataFrame:
+    """
+    保存済みOHLCVに対して gap / duplicate / outlier を列挙する（全てベクトル演算）。
+    known（再取得しても直らなかった足の時刻）に含まれる gap / outlier は known_gap / known_outlier とする。
+    戻り値: OpenTime, issue の DataFrame（時刻順）
+    """
+    columns = ["OpenTime", "issue"]
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    times = pd.DatetimeIndex(pd.to_datetime(df["OpenTime"]))
+
+    grid = expected_grid(times.min(), times.max(), interval, market)
+    gaps = grid.difference(times)
+
+    dups = times[times.duplicated()].unique()
+
+    # 重複を除いた時系列で外れ値を判定
+    clean = df.assign(OpenTime=times).drop_duplicates("OpenTime", keep="last").sort_values("OpenTime")
+    ohlc = clean[["Open", "High", "Low", "Close"]].apply(pd.to_numeric, errors="coerce").to_numpy()
+    o, h, l, c = ohlc.T
+    bad_range = (
+        np.isnan(ohlc).any(axis=1) | (ohlc <= 0).any(axis=1) |
+        (h < l) | (c > h) | (c < l) | (o > h) | (o < l)
+    )
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ret = np.diff(np.log(c), prepend=np.nan)
+        med = np.nanmedian(ret) if len(ret) > 1 else 0.0
+        mad = np.nanmedian(np.abs(ret - med)) * 1.4826 if len(ret) > 1 else 0.0
+        z = np.abs(ret - med) / mad if mad > 0 else np.zeros_like(ret)
+    spikes = np.nan_to_num(z) > OUTLIER_Z
+    outliers = pd.DatetimeIndex(clean["OpenTime"].to_numpy()[bad_range | spikes])
+
+    index = pd.concat([
+        pd.DataFrame({"OpenTime": gaps, "issue": "gap"}),
+        pd.DataFrame({"OpenTime": dups, "issue": "duplicate"}),
+        pd.DataFrame({"OpenTime": outliers, "issue": "outlier"}),
+    ], ignore_index=True)
+    if known:
+        is_known = index["issue"].isin(REFETCH_ISSUES) & index["OpenTime"].isin(pd.DatetimeIndex(list(known)))
+        index.loc[is_known, "issue"] = "known_" + index.loc[is_known, "issue"]
+    return index.sort_values("OpenTime", kind="stable").reset_index(drop=True)[columns]
+
+def pages_to_refetch(index: pd.DataFrame, interval: str) -> list[str]:
+    """
+    問題のある足を含むAPIページ（date パラメータ）だけを返す。
+    duplicate は保存時の重複除去で直り、known_* は再取得しても直らないので対象外。
+    """
+    targets = pd.DatetimeIndex(index.loc[index["issue"].isin(REFETCH_ISSUES), "OpenTime"])
+    if targets.empty:
+        return []
+    if interval in YEARLY_INTERVALS:
+        return sorted({str(y) for y in targets.year})
+    return sorted(set((targets - PAGE_OFFSET).strftime("%Y%m%d")))
+
+# ==== 解消できない問題の記録 ====
+def load_known_issues(path=KNOWN_ISSUES_FILE) -> dict:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_known_issues(known_issues: dict, path=KNOWN_ISSUES_FILE):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(known_issues, f, ensure_ascii=False)
+
+# ==== 対象ページのみ再取得 ====
+def repair_ohlcv(df: pd.DataFrame, symbol: str, interval: str, market: str, price_type: str = "BID",
+                 known_issues_file=KNOWN_ISSUES_FILE):
+    """
+    品質インデックスを作り、問題のあるページだけ再取得してマージする。
+    再取得後も残った gap / outlier は known_issues_file に記録し、次回以降は再取得しない。
+    戻り値: (修復後DataFrame, 修復後の品質インデックス)
+    """
+    key = f"{symbol}|{interval}|{market}"
+    known_issues = load_known_issues(known_issues_file)
+    known = set(pd.to_datetime(known_issues.get(key, [])))
+
+    index = build_quality_index(df, interval, market, known)
+    pages = pages_to_refetch(index, interval)
+
+    frames = [df.assign(OpenTime=pd.to_datetime(df["OpenTime"]))]
+    for date_str in pages:
+        try:
+            frames.append(fetch_klines(symbol, interval, market, date_str, price_type=price_type))
+        except Exception as e:
+            print(f"{market} {symbol} re-fetch error on {date_str}: {e}")
+
+    repaired = (
+        pd.concat(frames)
+        .drop_duplicates("OpenTime", keep="last")
+        .sort_values("OpenTime")
+        .reset_index(drop=True)
+    )
+    if pages:
+        print(f"{symbol} {interval}: re-fetched {len(pages)} pages ({len(index)} issues)")
+        index = build_quality_index(repaired, interval, market, known)
+        # 再取得したページに残った問題は取引所側に足が無いとみなす
+        remaining = index.loc[index["issue"].isin(REFETCH_ISSUES), "OpenTime"]
+        known |= set(remaining)
+        index.loc[index["issue"].isin(REFETCH_ISSUES), "issue"] = "known_" + index["issue"]
+
+    # 保存範囲より古い記録は捨てる
+    oldest = repaired["OpenTime"].min() if not repaired.empty else None
+    kept = sorted(t.isoformat() for t in known if oldest is None or t >= oldest)
+    if kept != sorted(known_issues.get(key, [])):
+        known_issues[key] = kept
+        save_known_issues(known_issues, known_issues_file)
+    return repaired, index
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument("symbols_csv", type=str, help="銘柄リストCSV (例: symbols.csv)")
+    parser.add_argument("--no_refetch", action="store_true", help="品質インデックスの出力のみ")
+    args = parser.parse_args()
+
+    df_symbols = pd.read_csv(args.symbols_csv)
+    for symbol, market in zip(df_symbols["symbol"], df_symbols["type"]):
+        for interval in INTERVAL_FREQ:
+            fname = f"{symbol}_{interval}_{market}.csv"
+            try:
+                df = pd.read_csv(fname, parse_dates=["OpenTime"])
+            except FileNotFoundError:
+                print(f"CSV not found: {fname}")
+                continue
+
+            if args.no_refetch:
+                known = pd.to_datetime(load_known_issues().get(f"{symbol}|{interval}|{market}", []))
+                index = build_quality_index(df, interval, market, set(known))
+            else:
+                df, index = repair_ohlcv(df, symbol, interval, market)
+                df.to_csv(fname, index=False)
+
+            out_name = f"{symbol}_{interval}_{market}_quality.csv"
+            index.to_csv(out_name, index=False)
+            print(f"Saved {out_name} ({len(index)} issues)")
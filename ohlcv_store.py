@@ -0,0 +1,222 @@
+# ohlcv_store.py
+import os
+import glob
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from market_calendar import INTERVAL_SECONDS, bar_offset
+
+# 足ごとの保持期間（日）
+RETENTION_DAYS = {
+    "15min": 30,
+    "1hour": 180,
+    "4hour": 730,
+}
+
+# 保持期間を過ぎた足は、ここに指定した上位足へ集約してから捨てる
+DOWNSAMPLE_TO = {
+    "15min": ["1hour", "4hour"],
+}
+
+RESAMPLE_RULE = {
+    "15min": "15min",
+    "1hour": "1h",
+    "4hour": "4h",
+}
+
+OHLCV_AGG = {"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"}
+
+# ==== 保持期間・ダウンサンプリング ====
+def apply_retention(df: pd.DataFrame, interval: str, now=None) -> pd.DataFrame:
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    cutoff = now - pd.Timedelta(days=RETENTION_DAYS[interval])
+    return df[pd.to_datetime(df["OpenTime"]) >= cutoff].reset_index(drop=True)
+
+def downsample(df: pd.DataFrame, interval: str, offset=None) -> pd.DataFrame:
+    """
+    上位足へ集約する。offset は JST 0:00 に対する足の位相（market_calendar.bar_offset）。
+    """
+    if df.empty:
+        return df
+    out = (
+        df.assign(OpenTime=pd.to_datetime(df["OpenTime"]))
+        .set_index("OpenTime")
+        .resample(RESAMPLE_RULE[interval], label="left", closed="left",
+                  origin="start_day", offset=offset or pd.Timedelta(0))
+        .agg(OHLCV_AGG)
+        .dropna(subset=["Close"])
+        .reset_index()
+    )
+    return out
+
+def overlaps_existing(times, existing, interval: str):
+    """
+    times の各足の区間 [t, t+足長) が existing のいずれかの足の区間と重なるか（ベクトル演算）。
+    """
+    # CSV 由来の OpenTime は pandas のバージョンで解像度（ns / us）が違うので ns に揃えてから整数化する
+    times = pd.DatetimeIndex(pd.to_datetime(pd.Series(times))).as_unit("ns").asi8
+    existing = np.sort(pd.DatetimeIndex(pd.to_datetime(pd.Series(existing))).as_unit("ns").asi8)
+    if len(existing) == 0 or len(times) == 0:
+        return np.zeros(len(times), dtype=bool)
+    step = INTERVAL_SECONDS[interval] * 10**9
+    pos = np.searchsorted(existing, times)
+    after = existing[np.minimum(pos, len(existing) - 1)]
+    before = existing[np.maximum(pos - 1, 0)]
+    return (np.abs(after - times) < step) | (np.abs(times - before) < step)
+
+# ==== パーティション（日次ファイル → 月次ファイルへ圧縮） ====
+def partition_dir(root: str, symbol: str, market: str, interval: str) -> str:
+    return os.path.join(root, f"{symbol}_{market}", interval)
+
+def read_partitions(root: str, symbol: str, market: str, interval: str) -> pd.DataFrame:
+    files = sorted(glob.glob(os.path.join(partition_dir(root, symbol, market, interval), "*.csv")))
+    if not files:
+        return pd.DataFrame(columns=["OpenTime", *OHLCV_AGG])
+    df = pd.concat([pd.read_csv(f, parse_dates=["OpenTime"]) for f in files])
+    return df.drop_duplicates("OpenTime", keep="last").sort_values("OpenTime").reset_index(drop=True)
+
+def write_partitions(root: str, symbol: str, market: str, interval: str, df: pd.DataFrame):
+    """
+    足を日次パーティション（YYYYMMDD.csv）に書き込む。既存の月次ファイルに含まれる月は
+    月次ファイル側にマージする。
+    """
+    if df.empty:
+        return
+    path = partition_dir(root, symbol, market, interval)
+    os.makedirs(path, exist_ok=True)
+
+    df = df.assign(OpenTime=pd.to_datetime(df["OpenTime"]))
+    for day, part in df.groupby(df["OpenTime"].dt.strftime("%Y%m%d")):
+        monthly = os.path.join(path, f"{day[:6]}.csv")
+        fname = monthly if os.path.exists(monthly) else os.path.join(path, f"{day}.csv")
+        if os.path.exists(fname):
+            part = pd.concat([pd.read_csv(fname, parse_dates=["OpenTime"]), part])
+        part = part.drop_duplicates("OpenTime", keep="last").sort_values("OpenTime")
+        part.to_csv(fname, index=False)
+
+def compact_partitions(root: str, symbol: str, market: str, interval: str, now=None) -> int:
+    """
+    当月より前の日次パーティションを月次ファイルにまとめる。戻り値は削除した日次ファイル数。
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    current_month = now.strftime("%Y%m")
+    path = partition_dir(root, symbol, market, interval)
+
+    by_month = {}
+    for f in glob.glob(os.path.join(path, "????????.csv")):
+        month = os.path.basename(f)[:6]
+        if month < current_month:
+            by_month.setdefault(month, []).append(f)
+
+    removed = 0
+    for month, files in sorted(by_month.items()):
+        monthly = os.path.join(path, f"{month}.csv")
+        frames = [pd.read_csv(f, parse_dates=["OpenTime"]) for f in sorted(files)]
+        if os.path.exists(monthly):
+            frames.insert(0, pd.read_csv(monthly, parse_dates=["OpenTime"]))
+        merged = pd.concat(frames).drop_duplicates("OpenTime", keep="last").sort_values("OpenTime")
+        merged.to_csv(monthly, index=False)
+        for f in files:
+            os.remove(f)
+        removed += len(files)
+    return removed
+
+def expire_partitions(root: str, symbol: str, market: str, interval: str, now=None) -> int:
+    """
+    保持期間を過ぎたパーティションを削除（期間をまたぐ月次ファイルは行単位で切り詰め）。
+    保持期間外の足は DOWNSAMPLE_TO の上位足に集約して残す。
+    """
+    path = partition_dir(root, symbol, market, interval)
+    files = {}
+    expired = []
+    for f in sorted(glob.glob(os.path.join(path, "*.csv"))):
+        df = pd.read_csv(f, parse_dates=["OpenTime"])
+        kept = apply_retention(df, interval, now)
+        if len(kept) < len(df):
+            files[f] = (len(df), kept)
+            expired.append(df[~df["OpenTime"].isin(kept["OpenTime"])])
+    if not files:
+        return 0
+
+    # 期限切れ分をまとめて上位足へ集約してから下位足を切り詰める（上位足の読み込みは1回ずつ）
+    expired = pd.concat(expired)
+    for target in DOWNSAMPLE_TO.get(interval, []):
+        existing = read_partitions(root, symbol, market, target)
+        # 既存の上位足と同じ位相で集約し、既存の足と時間が重なるものは捨てる
+        agg = downsample(expired, target, bar_offset(existing["OpenTime"], target))
+        agg = agg[~overlaps_existing(agg["OpenTime"], existing["OpenTime"], target)]
+        write_partitions(root, symbol, market, target, agg)
+
+    removed = 0
+    for f, (n_rows, kept) in files.items():
+        if kept.empty:
+            os.remove(f)
+        else:
+            kept.to_csv(f, index=False)
+        removed += n_rows - len(kept)
+    return removed
+
+# ==== メモリ上限つき LRU バーキャッシュ ====
+class BarCache:
+    """
+    (symbol, interval) -> DataFrame のキャッシュ。合計メモリが max_bytes を超えたら
+    最も長く使われていない銘柄から捨てる。
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()
+        self._sizes = {}
+        self.total_bytes = 0
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key, df: pd.DataFrame):
+        self.pop(key)
+        size = int(df.memory_usage(index=True, deep=True).sum())
+        self._data[key] = df
+        self._sizes[key] = size
+        self.total_bytes += size
+        # 最新のエントリ1つは上限を超えていても保持する
+        while self.total_bytes > self.max_bytes and len(self._data) > 1:
+            old_key, _ = self._data.popitem(last=False)
+            self.total_bytes -= self._sizes.pop(old_key)
+
+    def pop(self, key):
+        if key in self._data:
+            self.total_bytes -= self._sizes.pop(key)
+            return self._data.pop(key)
+        return None
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="フラットCSVをパーティションへ取り込み、保持期間と圧縮を適用")
+    parser.add_argument("symbols_csv", type=str, help="銘柄リストCSV (例: symbols.csv)")
+    parser.add_argument("--root", default="ohlcv_store")
+    args = parser.parse_args()
+
+    df_symbols = pd.read_csv(args.symbols_csv)
+    for symbol, market in zip(df_symbols["symbol"], df_symbols["type"]):
+        for interval in RETENTION_DAYS:
+            fname = f"{symbol}_{interval}_{market}.csv"
+            if os.path.exists(fname):
+                write_partitions(args.root, symbol, market, interval, pd.read_csv(fname, parse_dates=["OpenTime"]))
+
+        # 下位足の期限切れ分を上位足へ集約してから上位足を処理する
+        for interval in RETENTION_DAYS:
+            expired = expire_partitions(args.root, symbol, market, interval)
+            compacted = compact_partitions(args.root, symbol, market, interval)
+            print(f"{symbol} {interval}: expired {expired} bars, compacted {compacted} daily files")
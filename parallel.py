@@ -0,0 +1,17 @@
+# parallel.py
+from concurrent.futures import ProcessPoolExecutor
+
+# ==== プロセスプールでの順序付き実行 ====
+def chunksize(n_tasks: int, workers: int) -> int:
+    # ワーカーあたり4チャンク程度に分けて、投入のオーバーヘッドと偏りを両立させる
+    return max(1, n_tasks // (workers * 4))
+
+def map_tasks(func, tasks: list, workers: int = 1) -> list:
+    """
+    tasks を func で処理し、投入順に結果を返す（workers <= 1 なら直列）。
+    func はモジュールトップレベルの関数（pickle 可能）であること。
+    """
+    if workers <= 1:
+        return [func(t) for t in tasks]
+    with ProcessPoolExecutor(max_workers=workers) as ex:
+        return list(ex.map(func, tasks, chunksize=chunksize(len(tasks), workers)))
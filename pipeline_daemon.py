@@ -0,0 +1,185 @@
+# pipeline_daemon.py
+"""
+常駐モード：足確定（15min / 1hour / 4hour）ごとに起きて、
+その足で更新が必要なステージだけを実行する。
+
+OHLCV・特徴量・HTTP/LLMクライアントはプロセス内に保持したまま使い回す。
+"""
+import json
+import time
+import argparse
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+from fetch_gmo_ohlcv import fetch_ohlcv, fetch_all_latest_prices
+from ohlcv_calc import add_features
+from prepare_features import build_ai_input
+from notify_discord_all import notify_symbol
+from ohlcv_store import BarCache, apply_retention
+from ohlcv_quality import repair_ohlcv
+from instruments import quantize_ohlcv
+from market_calendar import (
+    JST, INTERVAL_SECONDS, PAGE_OFFSET, bar_offset, closed_bar_page, closed_intervals, is_fx_closed,
+)
+from cross_asset import CROSS_ASSET_INTERVAL, update_cross_asset
+
+OHLCV_COLUMNS = ["OpenTime", "Open", "High", "Low", "Close", "Volume"]
+
+# ==== スケジュール ====
+def next_bar_close(now_ts: float, step: int = INTERVAL_SECONDS["15min"]) -> int:
+    # 15分境界は UTC と JST で一致する（時差9時間）
+    return (int(now_ts) // step + 1) * step
+
+# ==== 常駐パイプライン ====
+class PipelineDaemon:
+    def __init__(self, symbols_csv, model="gpt-5-mini", days=30, notify_interval="1hour", settle_seconds=10,
+                 cache_mb=256):
+        df_symbols = pd.read_csv(symbols_csv)
+        self.df_symbols = df_symbols
+        self.symbols = list(zip(df_symbols["symbol"], df_symbols["type"].str.lower()))
+        self.model = model
+        self.days = days
+        self.notify_interval = notify_interval
+        self.settle_seconds = settle_seconds
+        # (symbol, interval) -> OHLCV DataFrame（上限を超えたら LRU で破棄し、次回はCSVから再読込）
+        self.ohlcv = BarCache(max_bytes=cache_mb * 1024 * 1024)
+        # 足の位相（JST 0:00 起点からのずれ）。warm_up で保存済みの足から求める
+        self.offsets = {}
+
+    def _active_symbols(self, bar_open_jst):
+        # 確定した15分足の始値時刻でFXのクローズ判定（ohlcv_quality と同じ定義）
+        return [(s, m) for s, m in self.symbols if not (m == "forex" and is_fx_closed(bar_open_jst))]
+
+    def _load(self, symbol, market, interval):
+        df = self.ohlcv.get((symbol, interval))
+        if df is not None:
+            return df
+        try:
+            return pd.read_csv(f"{symbol}_{interval}_{market}.csv", parse_dates=["OpenTime"])
+        except FileNotFoundError:
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+
+    def _merge(self, old, new, interval):
+        df = (
+            pd.concat([old, new])
+            .drop_duplicates("OpenTime", keep="last")
+            .sort_values("OpenTime")
+            .reset_index(drop=True)
+        )
+        return apply_retention(df, interval)
+
+    def _store(self, symbol, market, interval, df):
+        if df.empty:
+            # 空で既存CSVを上書きしない
+            print(f"No data for {symbol} {interval}, keeping stored CSV")
+            return
+        self.ohlcv.put((symbol, interval), df)
+        df.to_csv(f"{symbol}_{interval}_{market}.csv", index=False)
+        add_features(df.copy()).to_csv(f"{symbol}_{interval}_{market}_features.csv", index=False)
+
+    def _backfill_days(self, df):
+        # 最後に保存した足から現在までの日付ページ数（日付ページは6:00 JST区切りなので余裕を持たせる）
+        if df.empty:
+            return self.days
+        last = pd.to_datetime(df["OpenTime"]).max()
+        today = (datetime.now(JST) - PAGE_OFFSET).date()
+        return max(1, min(self.days, (today - (last - PAGE_OFFSET).date()).days + 1))
+
+    def warm_up(self):
+        # 起動時：既存CSVを読み、停止中に抜けた分を取得してから欠損ページを修復
+        open_times = {interval: [] for interval in INTERVAL_SECONDS}
+        for symbol, market in self.symbols:
+            for interval in INTERVAL_SECONDS:
+                old = self._load(symbol, market, interval)
+                print(f"Fetching {interval} data for {symbol}...")
+                new = fetch_ohlcv(symbol, interval, market, days=self._backfill_days(old))
+                df = self._merge(old, new, interval)
+                if not df.empty:
+                    df, _ = repair_ohlcv(df, symbol, interval, market)
+                    df = quantize_ohlcv(apply_retention(df, interval), symbol)
+                    open_times[interval].append(df["OpenTime"])
+                self._store(symbol, market, interval, df)
+
+        # 保存済みの足の位相に合わせて足確定時刻を判定する
+        for interval, times in open_times.items():
+            self.offsets[interval] = bar_offset(pd.concat(times) if times else [], interval)
+
+    def update_ohlcv(self, symbol, market, interval, bar_close_jst):
+        # 確定した足を含むページ（JST 6:00 区切り、4時間足は年ページ）だけ取得して保持中のデータにマージ
+        new = fetch_ohlcv(symbol, interval, market, pages=[closed_bar_page(bar_close_jst, interval)])
+        if new.empty:
+            print(f"No new data for {symbol} {interval}")
+            return
+        df = self._merge(self._load(symbol, market, interval), new, interval)
+        self._store(symbol, market, interval, df)
+
+    def run_once(self, bar_close_ts):
+        now_jst = datetime.fromtimestamp(bar_close_ts, JST)
+        intervals = closed_intervals(now_jst, self.offsets)
+        targets = self._active_symbols(now_jst - timedelta(seconds=INTERVAL_SECONDS["15min"]))
+        print(f"\n=== Bar close {now_jst.strftime('%Y-%m-%d %H:%M')} JST {intervals} ===")
+
+        for symbol, market in targets:
+            for interval in intervals:
+                try:
+                    self.update_ohlcv(symbol, market, interval, now_jst)
+                except Exception as e:
+                    print(f"{symbol} {interval} update error: {e}")
+
+        # 相関・通貨強弱は新しい足の分だけ差分更新
+        if CROSS_ASSET_INTERVAL in intervals:
+            try:
+                update_cross_asset(self.df_symbols)
+            except Exception as e:
+                print(f"cross-asset update error: {e}")
+
+        # 通知対象の足が確定したときだけ AI入力生成 → 通知
+        if self.notify_interval not in intervals:
+            return
+
+        latest = fetch_all_latest_prices()
+        for symbol, market in targets:
+            if symbol not in latest:
+                print(f"Missing latest rate for {symbol}")
+                continue
+            try:
+                with open(build_ai_input(symbol, market), "r", encoding="utf-8") as f:
+                    ai_input = json.load(f)
+                latest_price = (latest[symbol]["bid"] + latest[symbol]["ask"]) / 2
+                notify_symbol(ai_input, symbol, market, latest_price, model_name=self.model)
+            except Exception as e:
+                print(f"{symbol} notify error: {e}")
+
+    def run_forever(self):
+        self.warm_up()
+        while True:
+            bar_close_ts = next_bar_close(time.time())
+            # 足確定後、APIに反映されるまで少し待つ
+            time.sleep(max(0.0, bar_close_ts + self.settle_seconds - time.time()))
+            self.run_once(bar_close_ts)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("symbols_csv", type=str, help="銘柄リストCSV (例: symbols.csv)")
+    parser.add_argument("--model", default="gpt-5-mini")
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--notify_interval", default="1hour", choices=list(INTERVAL_SECONDS))
+    parser.add_argument("--settle_seconds", type=int, default=10)
+    parser.add_argument("--cache_mb", type=int, default=256, help="メモリ上のOHLCVキャッシュ上限 (MB)")
+    parser.add_argument("--once", action="store_true", help="直近の足確定分を1回だけ処理して終了")
+    args = parser.parse_args()
+
+    daemon = PipelineDaemon(
+        args.symbols_csv,
+        model=args.model,
+        days=args.days,
+        notify_interval=args.notify_interval,
+        settle_seconds=args.settle_seconds,
+        cache_mb=args.cache_mb,
+    )
+    if args.once:
+        daemon.warm_up()
+        daemon.run_once(next_bar_close(time.time()) - INTERVAL_SECONDS["15min"])
+    else:
+        daemon.run_forever()
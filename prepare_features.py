@@ -1,9 +1,13 @@
 import pandas as pd
-import sys
 import os
 import json
 import numpy as np
 
+from parallel import map_tasks
+from instruments import quantize_price
+from indicators import DEFAULT_INDICATORS
+from cross_asset import load_summary as load_cross_asset_summary
+
 TIMEFRAMES = {
     "15m": "15min",
     "1h": "1hour",
@@ -13,7 +17,25 @@ TIMEFRAMES = {
 # =========================
 # 既存：特徴量要約
 # =========================
-def calculate_features(df):
+# 拡張インジケータの要約キー → ohlcv_calc の列名（期間は indicators.DEFAULT_INDICATORS に従う）
+ATR_N = DEFAULT_INDICATORS["atr"]["period"]
+ADX_N = DEFAULT_INDICATORS["adx"]["period"]
+VWAP_N = DEFAULT_INDICATORS["vwap"]["window"]
+OPTIONAL_COLS = {
+    f"atr{ATR_N}": f"ATR_{ATR_N}",
+    f"adx{ADX_N}": f"ADX_{ADX_N}",
+    f"plus_di{ADX_N}": f"PLUS_DI_{ADX_N}",
+    f"minus_di{ADX_N}": f"MINUS_DI_{ADX_N}",
+    "bb_upper": "BB_upper",
+    "bb_lower": "BB_lower",
+    "bb_width": "BB_width",
+    f"vwap{VWAP_N}": f"VWAP_{VWAP_N}",
+}
+
+# 呼値単位に丸める価格水準の項目
+PRICE_LEVEL_KEYS = ["sma20", "sma50", f"atr{ATR_N}", "bb_upper", "bb_lower", f"vwap{VWAP_N}"]
+
+def calculate_features(df, symbol=None):
     df20 = df.tail(20).reset_index(drop=True)
     returns = df20["Close"].pct_change().dropna()
 
@@ -29,13 +51,24 @@ def calculate_features(df):
         "last_ret": float(returns.iloc[-1]) if not returns.empty else 0.0
     }
 
+    # 拡張インジケータ（ohlcv_calc で計算済みの列があれば追加）
+    for key, col in OPTIONAL_COLS.items():
+        if col in df20 and pd.notna(df20[col].iloc[-1]):
+            features_summary[key] = float(df20[col].iloc[-1])
+
+    # 銘柄が分かれば価格水準を呼値単位に丸めてペイロードを縮める
+    price = (lambda x: quantize_price(x, symbol)) if symbol else float
+    for key in PRICE_LEVEL_KEYS:
+        if key in features_summary and not np.isnan(features_summary[key]):
+            features_summary[key] = price(features_summary[key])
+
     recent_rows = df.tail(3)
     recent_ohlc = [
         {
-            "o": float(r.Open),
-            "h": float(r.High),
-            "l": float(r.Low),
-            "c": float(r.Close),
+            "o": price(r.Open),
+            "h": price(r.High),
+            "l": price(r.Low),
+            "c": price(r.Close),
             "v": float(r.Volume)
         }
         for _, r in recent_rows.iterrows()
@@ -103,11 +136,17 @@ def derive_price_context(df):
 # ④ ボラティリティ状態
 # =========================
 def derive_volatility_state(df):
-    ret = df["Close"].pct_change()
-    recent_std = ret.tail(20).std()
-    past_std = ret.tail(100).std()
-
-    ratio = recent_std / (past_std + 1e-9)
+    atr_col = f"ATR_{ATR_N}"
+    if atr_col in df and df[atr_col].notna().any():
+        # ATR があれば直近ATRと過去100本の平均ATRを比較
+        atr = df[atr_col]
+        ratio = atr.iloc[-1] / (atr.tail(100).mean() + 1e-9)
+    else:
+        ret = df["Close"].pct_change()
+        recent_std = ret.tail(20).std()
+        past_std = ret.tail(100).std()
+
+        ratio = recent_std / (past_std + 1e-9)
 
     return {
         "volatility_level": "high" if ratio > 1.3 else "low" if ratio < 0.8 else "normal",
@@ -134,69 +173,86 @@ def derive_volume_context(df):
     }
 
 # =========================
-# メイン：AI入力生成
+# 1銘柄分のAI入力生成
 # =========================
-def prepare_ai_input(symbols_csv):
-    df_symbols = pd.read_csv(symbols_csv)
+def build_ai_input(symbol, market):
+    result = {"symbol": symbol}
+
+    phases = {}
 
-    for _, row in df_symbols.iterrows():
-        symbol = row["symbol"]
-        market = row["type"]
-        result = {"symbol": symbol}
+    for tf_label, tf_suffix in TIMEFRAMES.items():
+        fname = f"{symbol}_{tf_suffix}_{market}_features.csv"
+        if not os.path.exists(fname):
+            continue
 
-        phases = {}
+        df = pd.read_csv(fname)
 
-        for tf_label, tf_suffix in TIMEFRAMES.items():
-            fname = f"{symbol}_{tf_suffix}_{market}_features.csv"
-            if not os.path.exists(fname):
-                continue
+        recent_ohlc, features = calculate_features(df, symbol)
 
-            df = pd.read_csv(fname)
+        phase_label = derive_market_phase(df)
+        phase_tags = derive_phase_tags(df)
+        phases[tf_label] = phase_label
 
-            recent_ohlc, features = calculate_features(df)
+        tf_block = {
+            "market_phase": {
+                "label": phase_label,
+                "tags": phase_tags
+            },
+            "price_context": derive_price_context(df),
+            "volatility_state": derive_volatility_state(df),
+            "recent_ohlc": recent_ohlc,
+            "features_summary": features
+        }
 
-            phase_label = derive_market_phase(df)
-            phase_tags = derive_phase_tags(df)
-            phases[tf_label] = phase_label
+        # FXには volume_context を出さない
+        if market == "crypto":
+            tf_block["volume_context"] = derive_volume_context(df)
 
-            tf_block = {
-                "market_phase": {
-                    "label": phase_label,
-                    "tags": phase_tags
-                },
-                "price_context": derive_price_context(df),
-                "volatility_state": derive_volatility_state(df),
-                "recent_ohlc": recent_ohlc,
-                "features_summary": features
-            }
+        result.setdefault("timeframes", {})[tf_label] = tf_block
 
-            # FXには volume_context を出さない
-            if market == "crypto":
-                tf_block["volume_context"] = derive_volume_context(df)
+    # 上位足支配構造
+    if "4h" in phases and "1h" in phases:
+        dominant = "4h" if "trend" in phases["4h"] else "1h"
+    else:
+        dominant = "1h"
 
-            result.setdefault("timeframes", {})[tf_label] = tf_block
+    result["timeframe_relationship"] = {
+        "dominant_tf": dominant,
+        "alignment": phases
+    }
 
-        # 上位足支配構造
-        if "4h" in phases and "1h" in phases:
-            dominant = "4h" if "trend" in phases["4h"] else "1h"
-        else:
-            dominant = "1h"
+    # 銘柄間の相関・通貨強弱（cross_asset.py で事前集計済みの場合のみ）
+    cross_asset = load_cross_asset_summary().get(symbol)
+    if cross_asset:
+        result["cross_asset"] = cross_asset
 
-        result["timeframe_relationship"] = {
-            "dominant_tf": dominant,
-            "alignment": phases
-        }
+    out_name = f"{symbol}_ai_input.json"
+    with open(out_name, "w", encoding="utf-8") as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+
+    print(f"Saved {out_name}")
+    return out_name
+
+def _build_task(args):
+    return build_ai_input(*args)
 
-        out_name = f"{symbol}_ai_input.json"
-        with open(out_name, "w", encoding="utf-8") as f:
-            json.dump(result, f, ensure_ascii=False, indent=2)
+# =========================
+# メイン：AI入力生成
+# =========================
+def prepare_ai_input(symbols_csv, workers=1):
+    df_symbols = pd.read_csv(symbols_csv)
+    tasks = list(zip(df_symbols["symbol"], df_symbols["type"]))
 
-        print(f"Saved {out_name}")
+    # 銘柄ごとに独立。各ワーカーが自分で features CSV を読むので転送は銘柄名のみ
+    return map_tasks(_build_task, tasks, workers)
 
 # =========================
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python prepare_ai_input.py symbols.csv")
-        sys.exit(1)
+    import argparse
+
+    parser = argparse.ArgumentParser(usage="python prepare_features.py symbols.csv [--workers N]")
+    parser.add_argument("symbols_csv", type=str)
+    parser.add_argument("--workers", type=int, default=1, help="並列プロセス数 (1 = 直列)")
+    args = parser.parse_args()
 
-    prepare_ai_input(sys.argv[1])
+    prepare_ai_input(args.symbols_csv, workers=args.workers)
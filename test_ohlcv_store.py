@@ -0,0 +1,65 @@
+# test_ohlcv_store.py
+import pandas as pd
+
+from ohlcv_store import RETENTION_DAYS, expire_partitions, read_partitions, write_partitions
+
+NOW = pd.Timestamp("2026-06-15 12:00")
+EXPIRED_DAYS = 46  # 76日分の15分足のうち保持期間（30日）を過ぎた分
+
+def _bars(times):
+    return pd.DataFrame({
+        "OpenTime": times,
+        "Open": 1.0,
+        "High": 1.1,
+        "Low": 0.9,
+        "Close": 1.0,
+        "Volume": 1.0,
+    })
+
+def _write_15min(root):
+    start = NOW - pd.Timedelta(days=RETENTION_DAYS["15min"] + EXPIRED_DAYS)
+    write_partitions(root, "X", "crypto", "15min", _bars(pd.date_range(start, NOW, freq="15min")))
+    return start
+
+def test_expire_into_empty_higher_timeframes(tmp_path):
+    root = str(tmp_path)
+    start = _write_15min(root)
+
+    expired = expire_partitions(root, "X", "crypto", "15min", NOW)
+    assert expired == EXPIRED_DAYS * 24 * 4
+
+    hourly = read_partitions(root, "X", "crypto", "1hour")
+    assert len(hourly) == EXPIRED_DAYS * 24
+    assert hourly["OpenTime"].min() == start
+    assert (hourly["Volume"] == 4.0).all()
+
+    four_hourly = read_partitions(root, "X", "crypto", "4hour")
+    assert len(four_hourly) == EXPIRED_DAYS * 6
+    assert (four_hourly["Volume"] == 16.0).all()
+
+def test_expire_into_partly_filled_higher_timeframes(tmp_path):
+    root = str(tmp_path)
+    start = _write_15min(root)
+
+    # 1時間足は5月から保存済み、4時間足は JST 1:00 起点の位相で保存済み
+    existing_1h = pd.date_range("2026-05-01", NOW, freq="1h")
+    write_partitions(root, "X", "crypto", "1hour", _bars(existing_1h).assign(Volume=0.0))
+    existing_4h = pd.date_range("2026-05-01 01:00", NOW, freq="4h")
+    write_partitions(root, "X", "crypto", "4hour", _bars(existing_4h).assign(Volume=0.0))
+
+    expire_partitions(root, "X", "crypto", "15min", NOW)
+
+    # 保存済みの足は上書きせず、それより前の期限切れ分だけ集約して追加する
+    hourly = read_partitions(root, "X", "crypto", "1hour")
+    added = hourly[hourly["OpenTime"] < existing_1h[0]]
+    assert len(added) == len(pd.date_range(start, existing_1h[0], freq="1h", inclusive="left"))
+    assert (added["Volume"] == 4.0).all()
+    assert (hourly.loc[hourly["OpenTime"] >= existing_1h[0], "Volume"] == 0.0).all()
+
+    # 4時間足は既存の位相（1/5/9/...時）に合わせ、既存の足と重なる区間は作らない
+    four_hourly = read_partitions(root, "X", "crypto", "4hour")
+    added = four_hourly[four_hourly["Volume"] > 0]
+    assert not added.empty
+    assert set(four_hourly["OpenTime"].dt.hour) == {1, 5, 9, 13, 17, 21}
+    assert added["OpenTime"].max() + pd.Timedelta(hours=4) <= existing_4h[0]
+    assert four_hourly["OpenTime"].diff().dropna().eq(pd.Timedelta(hours=4)).all()